@@ -3,34 +3,194 @@ The telingo module contains functions to translate and solve temporal logic
 programs.
 
 Classes:
-Solver      -- Solver class.
-Application -- Main application class.
+GroundingPlan -- Program parts to ground per step.
+Solver        -- Solver class.
+Application   -- Main application class.
+Planner       -- Incremental planner returning plans (see telingo.planner).
 
 Functions:
-imain -- Function to run the incremetal solving loop.
-smain -- Function to run the incremetal solving loop scheduled.
-main  -- Main function starting an extended clingo application.
+imain        -- Function to run the incremetal solving loop.
+wmain        -- Function to run the receding horizon solving loop.
+omain        -- Function to run the incremental optimization loop.
+smain        -- Function to run the incremetal solving loop scheduled.
+format_model -- Function to format the states of a model.
+format_trace -- Function to format the changes between states of a model.
+portfolio_arguments
+             -- Function to request the threads of a portfolio.
+main         -- Main function starting an extended clingo application.
 """
 
 from . import transformers as _tf
 from . import theory as _ty
 from . import scheduler as _sd
+from . import memory as _mem
+from . import heartbeat as _hb
+from . import checkpoint as _cp
+from . import cache as _ch
 
 import sys as _sys
+import time as _time
+import csv as _csv
+import json as _json
 import clingo as _clingo
 import textwrap as _textwrap
+import re as _re
 
 from time import clock
 
+class _Unsatisfiable:
+    """
+    Stands in for the result of a solve call that has been skipped because the
+    cache proved the length unsatisfiable.
+    """
+    satisfiable   = False
+    unsatisfiable = True
+    unknown       = False
+
+    def __str__(self):
+        return "UNSAT"
+
+class _Restored:
+    """
+    Stands in for the result of a solve call restored from a checkpoint.
+    """
+    def __init__(self, status):
+        self.satisfiable   = status == "SAT"
+        self.unsatisfiable = status == "UNSAT"
+        self.unknown       = status == "UNKNOWN"
+        self.__status      = status
+
+    def __str__(self):
+        return self.__status
+
+def _solve(prg, on_model, assumptions, length=None):
+    """
+    Solves under the given assumptions.
+
+    If a heartbeat is enabled, the solve call reports its progress there.
+
+    Arguments:
+    prg         -- Control object holding the program.
+    on_model    -- Callback for intercepting models.
+    assumptions -- List of assumption literals.
+    length      -- Length being solved (for the heartbeat).
+    """
+    if _hb.monitor is not None:
+        return _hb.monitor.solve(prg, length, on_model=on_model, assumptions=assumptions)
+    return prg.solve(on_model=on_model, assumptions=assumptions)
+
+def _future_assumptions(prg, future_sigs, length):
+    """
+    Returns the negated future atoms referring to steps after the given length.
+    """
+    assumptions = []
+    for name, arity, positive in future_sigs:
+        for atom in prg.symbolic_atoms.by_signature(name, arity, positive):
+            if atom.symbol.arguments[-1].number > length:
+                assumptions.append(-atom.literal)
+    return assumptions
+
+class _AtomRecorder:
+    """
+    Ground program observer recording the head atoms of the rules passed to
+    the solver, grouped by the step whose grounding introduced them.
+
+    Members:
+    step  -- Step whose grounding is currently observed.
+    atoms -- Mapping from steps to the lists of atoms introduced.
+    """
+    def __init__(self):
+        self.step  = 0
+        self.atoms = {}
+
+    def rule(self, choice, head, body):
+        self.atoms.setdefault(self.step, []).extend(head)
+
+    def weight_rule(self, choice, head, lower_bound, body):
+        self.atoms.setdefault(self.step, []).extend(head)
+
+class GroundingPlan:
+    """
+    Grounding plan computed once from the program parts returned by the
+    transformation.
+
+    The parts of several consecutive steps can be grounded in one call (see
+    steps), which Solver.solve does when the scheduled length grows by more
+    than one step. Steps are never grounded ahead of the length being solved:
+    rules of steps after the horizon, like constraints in dynamic parts,
+    would restrict the models of the current horizon. Hence, no adaptive
+    number of steps is grounded per call.
+
+    Members:
+    __parts -- List of tuples (name, offset, first, last) where name is the
+               name of a program part, which has to be grounded offset steps
+               before each step in the range [first, last] (last is None if
+               the range is unbounded).
+    """
+    def __init__(self, program_parts):
+        """
+        Initializes the plan.
+
+        Arguments:
+        program_parts -- Program parts to ground (see imain).
+        """
+        self.__parts = []
+        for root_name, part_name, rng in program_parts:
+            for i in rng:
+                if root_name == "always":
+                    self.__parts.append((part_name, i, i, None))
+                elif root_name == "dynamic":
+                    self.__parts.append((part_name, i, i + 1, None))
+                elif root_name == "initial":
+                    self.__parts.append((part_name, i, i, i))
+
+    def step(self, step):
+        """
+        Returns the program parts to ground for the given step.
+        """
+        return [(name, [step - i, step]) for name, i, first, last in self.__parts
+                if first <= step and (last is None or step <= last)]
+
+    def steps(self, begin, end):
+        """
+        Returns the program parts to ground for the steps in the range
+        [begin, end) in one call.
+        """
+        parts = []
+        for step in range(begin, end):
+            parts.extend(self.step(step))
+        return parts
+
+"""
+Scheduler options a checkpoint has to agree on to be restored. The verbosity
+may change between runs.
+"""
+_g_checkpoint_options = ["A", "B", "C", "inc", "processes", "start", "limit", "restarts_per_solve",
+                         "conflicts_per_restart", "portfolio", "propagate_unsat", "forbid_actions",
+                         "force_actions", "move_final"]
+
+"""
+Heuristics assigned round-robin to the threads of a portfolio.
+"""
+_g_portfolio_heuristics = ["Vsids", "Berkmin", "Vmtf", "Domain"]
+
 class Solver:
     """
     Solver object containing the logic to ground and solve scheduled lengths.
     """
 
-    def __init__(self, ctl, theory, restarts_per_solve, conflicts_per_restart, move_final, verbose):
+    def __init__(self, ctl, theory, restarts_per_solve, conflicts_per_restart, move_final, verbose, portfolio=1):
         """
         Initializes the solver.
 
+        With a portfolio of several threads, the threads compete on each
+        length using different heuristics and seeds. All threads restart
+        after the same number of conflicts, so that restarts_per_solve bounds
+        the effort per length as with a single thread. The number of threads
+        of a control object is fixed when it is created (see
+        portfolio_arguments), so at most as many threads as the control
+        object has are configured.
+
         Arguments:
         ctl                     -- Control object holding the program.
         theory                  -- telingo theory.
@@ -38,6 +198,7 @@ class Solver:
         conflicts_per_restart   -- number of conflicts before restart.
         move_final              -- move final to current solving length, instead of maximum.
         verbose                 -- verbosity level.
+        portfolio               -- number of solver threads.
         """
         self.__ctl         = ctl
         self.__length      = 0
@@ -45,12 +206,17 @@ class Solver:
         self.__verbose     = verbose
         self.__result      = None
         self.__theory      = theory
+        self.__plan        = None
         self.__time0       = clock()
 
         # set solving and restart policy
         self.__ctl.configuration.solve.solve_limit = "umax,"+str(restarts_per_solve)
-        if int(conflicts_per_restart) != 0:
-            self.__ctl.configuration.solver[0].restarts = "F,"+str(conflicts_per_restart)
+        for i in range(min(portfolio, len(self.__ctl.configuration.solver))):
+            if int(conflicts_per_restart) != 0:
+                self.__ctl.configuration.solver[i].restarts = "F,"+str(conflicts_per_restart)
+            if portfolio > 1:
+                self.__ctl.configuration.solver[i].heuristic = _g_portfolio_heuristics[i % len(_g_portfolio_heuristics)]
+                self.__ctl.configuration.solver[i].seed = str(i)
 
         self.__move_final = move_final
 
@@ -84,14 +250,9 @@ class Solver:
         if self.__verbose: _sys.stdout.write("Grounded Until:\t {}\n".format(self.__length))
         # previous length < new length
         if self.__length < length:
-            parts = []
-            for t in range(self.__length+1, length+1):
-                for root_name, part_name, rng in program_parts:
-                    for i in rng:
-                        if ((t - i >= 0 and root_name == "always") or
-                            (t - i  > 0 and root_name == "dynamic") or
-                            (t - i == 0 and root_name == "initial")):
-                            parts.append((part_name, [t - i, t]))
+            if self.__plan is None:
+                self.__plan = GroundingPlan(program_parts)
+            parts = self.__plan.steps(self.__length+1, length+1)
             if length > 0:
                 if not self.__move_final:
                     self.__ctl.release_external(_clingo.Function("__final", [self.__length]))
@@ -129,13 +290,9 @@ class Solver:
                 self.__ctl.assign_external(_clingo.Function("__final", [self.__last_length]), False)
             self.__ctl.assign_external(_clingo.Function("__final", [length]), True)
 
-        assumptions = []
-        for name, arity, positive in future_sigs:
-            for atom in self.__ctl.symbolic_atoms.by_signature(name, arity, positive):
-                if atom.symbol.arguments[-1].number > length:
-                    assumptions.append(-atom.literal)
+        assumptions = _future_assumptions(self.__ctl, future_sigs, length)
 
-        self.__result = self.__ctl.solve(on_model=on_model, assumptions=assumptions)
+        self.__result = _solve(self.__ctl, on_model, assumptions, length)
         if self.__verbose:
             self.__verbose_end("Solving")
             _sys.stdout.write(str(self.__result)+"\n\n")
@@ -146,7 +303,7 @@ class Solver:
 
 
 
-def imain(prg, future_sigs, program_parts, on_model, imin = 0, imax = None, istop = "SAT"):
+def imain(prg, future_sigs, program_parts, on_model, imin = 0, imax = None, istop = "SAT", lazy = False, cache = None):
     """
     Take a program object and runs the incremental main solving loop.
 
@@ -172,37 +329,201 @@ def imain(prg, future_sigs, program_parts, on_model, imin = 0, imax = None, isto
     imin          -- Minimum number of iterations.
     imax          -- Maximum number of iterations.
     istop         -- When to stop.
+    lazy          -- Whether to add the clauses of temporal body formulas
+                     lazily via a propagator.
+    cache         -- Cache recording the results of solve calls (or None).
+
+    Horizons below the length up to which the cache proves all horizons
+    unsatisfiable are not solved. Unless the loop stops at unsatisfiable
+    horizons, they are grounded together with the next horizon to solve in a
+    single call.
+
+    Returns the result of the last solve call.
     """
-    f = _ty.Theory()
+    f = _ty.Theory(lazy)
+    plan = GroundingPlan(program_parts)
     step, ret = 0, None
+    unsat_bound = cache.unsat_bound if cache is not None else 0
     while ((imax is None or step < imax) and
            (step == 0 or step < imin or (
               (istop == "SAT"     and not ret.satisfiable) or
               (istop == "UNSAT"   and not ret.unsatisfiable) or
               (istop == "UNKNOWN" and not ret.unknown)))):
-        parts = []
-        for root_name, part_name, rng in program_parts:
-            for i in rng:
-                if ((step - i >= 0 and root_name == "always") or
-                    (step - i  > 0 and root_name == "dynamic") or
-                    (step - i == 0 and root_name == "initial")):
-                    parts.append((part_name, [step - i, step]))
+        last = step
+        if step < unsat_bound and istop != "UNSAT":
+            last = unsat_bound if imax is None else min(unsat_bound, imax-1)
         if step > 0:
             prg.release_external(_clingo.Function("__final", [step-1]))
             prg.cleanup()
 
-        prg.ground(parts)
+        prg.ground(plan.steps(step, last+1))
+        for t in range(step, last):
+            prg.release_external(_clingo.Function("__final", [t]))
+        f.translate(last, prg)
+        prg.assign_external(_clingo.Function("__final", [last]), True)
+        step = last
+        if step < unsat_bound:
+            ret, step = _Unsatisfiable(), step+1
+            continue
+        assumptions = _future_assumptions(prg, future_sigs, step)
+        ret = _solve(prg, lambda m: on_model(m, step), assumptions, step)
+        if cache is not None:
+            cache.add(step, ret)
+            cache.save()
+        step += 1
+    return ret
+
+def omain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, horizons=None, time_limit=None, lower=None, lazy=False):
+    """
+    Take a program object and runs the incremental optimization loop.
+
+    Like imain, the horizon is extended by one step in each iteration. Once a
+    model has been found, the loop continues with longer horizons, passing
+    the cost of the best model found so far as bound to the solver, so that
+    only strictly cheaper models are reported. Costs are compared
+    lexicographically by priority. If the program has no minimize
+    statements, the loop stops at the first model.
+
+    Apart from imax, the loop stops once the time limit is exceeded and,
+    after a model has been found, once the given number of horizons has been
+    solved starting with the horizon of the first model or the best cost
+    reaches the given lower bound.
+    No stop criterion except imax applies before imin iterations. Because the
+    lower bound might never be reached, it has to be combined with imax, the
+    time limit, or the number of horizons.
+
+    See imain for a description of the remaining arguments.
+
+    Arguments:
+    prg           -- Control object holding the program.
+    future_sigs   -- Signatures of predicates whose future incarnations have to
+                     be set to False.
+    program_parts -- Program parts to ground.
+    on_model      -- Callback for intercepting models.
+    imin          -- Minimum number of iterations.
+    imax          -- Maximum number of iterations.
+    horizons      -- Number of horizons to solve starting with the horizon of
+                     the first model.
+    time_limit    -- Number of seconds after which no further horizon is
+                     solved.
+    lower         -- Lower bound on the cost of any model (list of integers
+                     by priority).
+    lazy          -- Whether to add the clauses of temporal body formulas
+                     lazily via a propagator.
+
+    Returns the cost of the best model or None if there is none.
+    """
+    if lower is not None and imax is None and horizons is None and time_limit is None:
+        raise RuntimeError("a lower bound requires a maximum number of iterations, horizons, or a time limit")
+    f = _ty.Theory(lazy)
+    plan = GroundingPlan(program_parts)
+    start = _time.time()
+    step, best, first = 0, None, None
+    while imax is None or step < imax:
+        if step > 0:
+            prg.release_external(_clingo.Function("__final", [step-1]))
+            prg.cleanup()
+
+        prg.ground(plan.step(step))
         f.translate(step, prg)
         prg.assign_external(_clingo.Function("__final", [step]), True)
-        assumptions = []
-        for name, arity, positive in future_sigs:
-            for atom in prg.symbolic_atoms.by_signature(name, arity, positive):
-                if atom.symbol.arguments[-1].number > step:
-                    assumptions.append(-atom.literal)
-        ret, step = prg.solve(on_model=lambda m: on_model(m, step), assumptions=assumptions), step+1
+        if best:
+            # only models lexicographically smaller than the best one
+            prg.configuration.solve.opt_mode = "opt,{}".format(",".join(str(c) for c in best[:-1] + [best[-1] - 1]))
+        assumptions = _future_assumptions(prg, future_sigs, step)
+        costs = []
+        def intercept(m, step=step):
+            costs[:] = [list(m.cost)]
+            on_model(m, step)
+        _solve(prg, intercept, assumptions, step)
+        if costs:
+            best = costs[0]
+            if first is None:
+                first = step
+        step += 1
+        if step >= imin and (
+                (time_limit is not None and _time.time() - start >= time_limit) or
+                (best is not None and (
+                    len(best) == 0 or
+                    (lower is not None and best <= lower) or
+                    (horizons is not None and step - first >= horizons)))):
+            break
+    return best
+
+
+def wmain(prg, future_sigs, program_parts, on_model, window, imax=None, lazy=False):
+    """
+    Take a program object and runs the receding horizon solving loop.
+
+    Like imain, the horizon is extended by one step in each iteration.
+    Instead of stopping at the first answer, the loop continues until imax
+    iterations are reached or the program becomes unsatisfiable. Only the
+    last window+1 steps stay open: once a solution at horizon h is found, the
+    atoms introduced when grounding step h-window are committed to the truth
+    values they have in the last model, and the translation state of the
+    temporal formulas before that step is dropped. Hence, window should be at
+    least as large as the number of steps formulas refer to the past.
+
+    Ground rules cannot be removed from a control object. Each commit adds a
+    single rule deriving a fresh guard atom from the committed state and a
+    constraint requiring the guard; clingo's cleanup then turns the committed
+    atoms into facts, which keeps solving the open window cheap.
+
+    If a solve call is interrupted, a diagnostic is written to standard error
+    and the loop stops. Returns the result of the last solve call.
+
+    See imain for a description of the remaining arguments.
+
+    Arguments:
+    prg           -- Control object holding the program.
+    future_sigs   -- Signatures of predicates whose future incarnations have to
+                     be set to False.
+    program_parts -- Program parts to ground.
+    on_model      -- Callback for intercepting models.
+    window        -- Number of steps kept open before the horizon.
+    imax          -- Maximum number of iterations.
+    lazy          -- Whether to add the clauses of temporal body formulas
+                     lazily via a propagator.
+    """
+    f = _ty.Theory(lazy)
+    plan = GroundingPlan(program_parts)
+    recorder = _AtomRecorder()
+    prg.register_observer(recorder)
+    step, ret = 0, None
+    while imax is None or step < imax:
+        if step > 0:
+            prg.release_external(_clingo.Function("__final", [step-1]))
+            prg.cleanup()
 
+        recorder.step = step
+        prg.ground(plan.step(step))
+        f.translate(step, prg)
+        prg.assign_external(_clingo.Function("__final", [step]), True)
+        assumptions = _future_assumptions(prg, future_sigs, step)
+
+        commit, state = step - window, []
+        atoms = recorder.atoms.pop(commit, []) if commit >= 0 else []
+        def on_window_model(m):
+            state[:] = [atom if m.is_true(atom) else -atom for atom in atoms]
+            on_model(m, step)
+        ret = _solve(prg, on_window_model, assumptions, step)
+        if ret.unsatisfiable:
+            break
+        if not ret.satisfiable:
+            _sys.stderr.write("wmain: solving at horizon {} was interrupted\n".format(step))
+            break
 
-def smain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, istop="SAT", scheduler_options=_sd.Scheduler_Config()):
+        if commit >= 0:
+            if state:
+                with prg.backend() as b:
+                    guard = b.add_atom()
+                    b.add_rule([guard], state)
+                    b.add_rule([], [-guard])
+            f.forget(commit)
+        step += 1
+    return ret
+
+def smain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, istop="SAT", scheduler_options=_sd.Scheduler_Config(), lazy=False, checkpoint=None, cache=None):
     """
     Take a program object and runs the incremental scheduled main solving loop.
 
@@ -229,24 +550,30 @@ def smain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, istop="S
     imax                -- Maximum number of iterations.
     istop               -- When to stop.
     scheduler_options   -- options of the schedule to use.
+    lazy                -- Whether to add the clauses of temporal body
+                        formulas lazily via a propagator.
+    checkpoint          -- Checkpoint to resume from and save the state of
+                        the schedule to (or None).
+    cache               -- Cache recording the results of solve calls (or
+                        None). Lengths proven unsatisfiable by the cache are
+                        not solved.
+
+    If the checkpoint holds the state of a previous run with the same
+    scheduler options, the schedule continues where that run stopped. Lengths
+    are grounded on demand, so the program is regrounded up to the next
+    length to solve. The checkpoint is removed once a plan has been found or
+    the schedule is exhausted; otherwise, it is saved when the loop stops.
     """
-    theory = _ty.Theory()
+    theory = _ty.Theory(lazy)
     step, ret = 0, None
 
     # ground initial
-    parts = []
-    for root_name, part_name, rng in program_parts:
-        for i in rng:
-            if ((step - i >= 0 and root_name == "always") or
-                (step - i  > 0 and root_name == "dynamic") or
-                (step - i == 0 and root_name == "initial")):
-                parts.append((part_name, [step - i, step]))
-    prg.ground(parts)
+    prg.ground(GroundingPlan(program_parts).step(step))
     theory.translate(step, prg)
     prg.assign_external(_clingo.Function("__final", [step]), True)
 
     #solver
-    solver = Solver(prg, theory, scheduler_options.restarts_per_solve, scheduler_options.conflicts_per_restart, scheduler_options.move_final, scheduler_options.verbose)
+    solver = Solver(prg, theory, scheduler_options.restarts_per_solve, scheduler_options.conflicts_per_restart, scheduler_options.move_final, scheduler_options.verbose, scheduler_options.portfolio)
 
     #scheduler
     scheduler = scheduler_options.build_scheduler()
@@ -256,6 +583,21 @@ def smain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, istop="S
     print_length = 0
     length = 0
     i = 1
+    config = dict((key, getattr(scheduler_options, key)) for key in _g_checkpoint_options)
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None:
+        if state["config"] != config:
+            raise RuntimeError("checkpoint was written with different scheduler options")
+        scheduler = state["scheduler"]
+        scheduler.verbose = scheduler_options.verbose
+        step, i, max_length, print_length = state["step"], state["iteration"], state["max_length"], state["print_length"]
+        ret = _Restored(state["result"]) if state["result"] is not None else None
+
+    def snapshot():
+        return {"config": config, "scheduler": scheduler,
+                "step": step, "iteration": i, "max_length": max_length, "print_length": print_length,
+                "result": str(ret) if ret is not None else None}
+
     while ((imax is None or step < imax) and
            (step == 0 or step < imin or (
                (istop == "SAT"     and not ret.satisfiable) or
@@ -270,12 +612,148 @@ def smain(prg, future_sigs, program_parts, on_model, imin=0, imax=None, istop="S
         if length is None:
             _sys.stdout.write("PLAN NOT FOUND\n")
             break
+        if _hb.monitor is not None:
+            _hb.monitor.set_queue(scheduler.queue)
         # solve given length
         if scheduler_options.move_final or length > print_length: print_length = length
-        ret, step = solver.solve(length, future_sigs, program_parts, on_model=lambda m: on_model(m, print_length)), step+1
+        if cache is not None and cache.unsatisfiable(length):
+            ret, step = _Unsatisfiable(), step+1
+        else:
+            ret, step = solver.solve(length, future_sigs, program_parts, on_model=lambda m: on_model(m, print_length)), step+1
+            if cache is not None:
+                cache.add(length, ret)
+                cache.save()
         if ret is not None and length > max_length: max_length = length
         if ret is not None and ret.satisfiable and step >= imin: break
+        if checkpoint is not None:
+            checkpoint.save(snapshot())
         if scheduler_options.verbose: _sys.stdout.write("Iteration Time:\t {:.2f}s\n".format(clock()-time0)+"\n")
+    if checkpoint is not None:
+        if length is None or (ret is not None and ret.satisfiable):
+            checkpoint.remove()
+        else:
+            checkpoint.save(snapshot(), True)
+
+def format_model(model, horizon):
+    """
+    Returns the shown atoms of a model grouped by state as a string.
+
+    Atoms are printed without their time parameter one line per signature
+    below the state they belong to. Atoms starting with two underscores are
+    omitted.
+
+    Arguments:
+    model   -- The model to format.
+    horizon -- The number of states.
+    """
+    table = {}
+    for sym in model.symbols(shown=True):
+        if sym.type == _clingo.SymbolType.Function and len(sym.arguments) > 0:
+            table.setdefault(sym.arguments[-1].number, []).append(_clingo.Function(sym.name, sym.arguments[:-1], sym.positive))
+    out = []
+    for step in range(horizon+1):
+        symbols = table.get(step, [])
+        out.append(" State {}:".format(step))
+        sig = None
+        for sym in sorted(symbols):
+            if not sym.name.startswith('__'):
+                if (sym.name, len(sym.arguments), sym.positive) != sig:
+                    out.append("\n ")
+                    sig = (sym.name, len(sym.arguments), sym.positive)
+                out.append(" {}".format(sym))
+        out.append("\n")
+    return "".join(out)
+
+def _states(model, horizon):
+    """
+    Returns the shown atoms of a model as a list of sets holding the atoms of
+    each state in one pass over the shown symbols.
+
+    Atoms are pairs of a signature (name, arity, positive) without the time
+    parameter and a string holding the remaining arguments. Atoms starting
+    with two underscores are omitted.
+    """
+    states = [set() for _ in range(horizon+1)]
+    for sym in model.symbols(shown=True):
+        args = sym.arguments if sym.type == _clingo.SymbolType.Function else []
+        if len(args) > 0 and not sym.name.startswith('__') and args[-1].type == _clingo.SymbolType.Number:
+            step = args[-1].number
+            if 0 <= step <= horizon:
+                states[step].add(((sym.name, len(args)-1, sym.positive), ",".join(str(arg) for arg in args[:-1])))
+    return states
+
+def _sig_str(sig):
+    """
+    Returns the string representation name/arity of a signature.
+    """
+    return "{}{}/{}".format("" if sig[2] else "-", sig[0], sig[1])
+
+def _atom_str(sig, args):
+    """
+    Returns the string representation of an atom as returned by _states.
+    """
+    name = sig[0] if sig[2] else "-" + sig[0]
+    return "{}({})".format(name, args) if sig[1] > 0 else name
+
+def format_trace(model, horizon, mode="delta"):
+    """
+    Returns the changes between the states of a model as a string.
+
+    In mode delta, the atoms added to a state are printed with a leading +
+    and the atoms removed with a leading - below the state. The initial state
+    lists all its atoms as added.
+
+    In mode json, the model is printed as one line holding an object with a
+    predicate dictionary, listing signatures as strings name/arity, and a list
+    of states. Each state is an object listing the added and deleted atoms as
+    pairs of an index into the dictionary and a string with the arguments of
+    the atom:
+
+      {"predicates": ["p/1"], "states": [{"add": [[0, "a"]], "del": []}, ...]}
+
+    In mode csv, one line step,change,predicate,arguments is printed per
+    changed atom where change is either + or -.
+
+    Arguments:
+    model   -- The model to format.
+    horizon -- The number of states.
+    mode    -- One of delta, json, or csv.
+    """
+    states = _states(model, horizon)
+    prev, changes = set(), []
+    for atoms in states:
+        changes.append((sorted(atoms - prev), sorted(prev - atoms)))
+        prev = atoms
+    if mode == "json":
+        sigs = sorted(set(sig for atoms in states for sig, _ in atoms))
+        index = dict((sig, i) for i, sig in enumerate(sigs))
+        return _json.dumps({
+            "predicates": [_sig_str(sig) for sig in sigs],
+            "states": [{"add": [[index[sig], args] for sig, args in add],
+                        "del": [[index[sig], args] for sig, args in rem]} for add, rem in changes]},
+            separators=(",", ":")) + "\n"
+    out = []
+    if mode == "csv":
+        writer = _csv.writer(_Lines(out), lineterminator="\n")
+        for step, (add, rem) in enumerate(changes):
+            for change, atoms in (("+", add), ("-", rem)):
+                for sig, args in atoms:
+                    writer.writerow([step, change, _sig_str(sig), args])
+        return "".join(out)
+    for step, (add, rem) in enumerate(changes):
+        out.append(" State {}:\n ".format(step))
+        for change, atoms in (("+", add), ("-", rem)):
+            for sig, args in atoms:
+                out.append(" {}{}".format(change, _atom_str(sig, args)))
+        out.append("\n")
+    return "".join(out)
+
+class _Lines:
+    """
+    Stream appending the strings written to a list.
+    """
+    def __init__(self, out):
+        self.write = out.append
 
 class Application:
     """
@@ -297,6 +775,20 @@ class Application:
         self.__imax = None
         self.__istop = "SAT"
         self.__horizon = 0
+        self.__window = None
+        self.__transform_cache = None
+        self.__transform_jobs = 1
+        self.__lazy = False
+        self.__profile = _clingo.Flag(False)
+        self.__memory_report = None
+        self.__heartbeat = None
+        self.__checkpoint = None
+        self.__unsat_cache = None
+        self.__trace = "states"
+        self.__optimize = False
+        self.__opt_horizons = None
+        self.__opt_time = None
+        self.__opt_lower = None
         self.__scheduler_config = _sd.Scheduler_Config()
 
     def __on_model(self, model, horizon):
@@ -327,6 +819,113 @@ class Application:
             self.__imax = None
             return True
 
+    def __parse_window(self, value):
+        """
+        Parse window argument.
+        """
+        self.__window = int(value)
+        return self.__window >= 0
+
+    def __parse_transform_cache(self, value):
+        """
+        Parse transform-cache argument.
+        """
+        self.__transform_cache = value
+        return len(value) > 0
+
+    def __parse_transform_jobs(self, value):
+        """
+        Parse transform-jobs argument.
+        """
+        self.__transform_jobs = int(value)
+        return self.__transform_jobs >= 1
+
+    def __parse_body_engine(self, value):
+        """
+        Parse body-engine argument.
+        """
+        value = value.lower()
+        self.__lazy = value == "lazy"
+        return value in ["eager", "lazy"]
+
+    def __parse_memory_report(self, value):
+        """
+        Parse memory-report argument.
+        """
+        self.__memory_report = int(value)
+        return self.__memory_report >= 1
+
+    def __parse_heartbeat(self, value):
+        """
+        Parse heartbeat argument.
+        """
+        path, _, interval = value.partition(",")
+        interval = float(interval) if interval else 10.0
+        self.__heartbeat = (path, interval)
+        return len(path) > 0 and interval > 0
+
+    def __parse_checkpoint(self, value):
+        """
+        Parse checkpoint argument.
+        """
+        path, _, interval = value.partition(",")
+        interval = float(interval) if interval else 60.0
+        self.__checkpoint = (path, interval)
+        return len(path) > 0 and interval >= 0
+
+    def __parse_unsat_cache(self, value):
+        """
+        Parse unsat-cache argument.
+        """
+        self.__unsat_cache = value
+        return len(value) > 0
+
+    def __unsat_cache_key(self, prg, program):
+        """
+        Returns the key of the unsat cache entry for the given program.
+
+        Besides the program, the key covers the values of the constants it
+        mentions because constants given on the command line change which
+        lengths are unsatisfiable.
+        """
+        extra = ["% unsat-cache"]
+        for name in sorted(set(_re.findall(r"\b_*[a-z][A-Za-z0-9_']*", "\n".join(program)))):
+            value = prg.get_const(name)
+            if value is not None:
+                extra.append("{}={}".format(name, value))
+        return _tf._cache_key(program + ["\n".join(extra)])
+
+    def __parse_opt_horizons(self, value):
+        """
+        Parse opt-horizons argument.
+        """
+        self.__optimize = True
+        self.__opt_horizons = int(value)
+        return self.__opt_horizons >= 1
+
+    def __parse_opt_time(self, value):
+        """
+        Parse opt-time argument.
+        """
+        self.__optimize = True
+        self.__opt_time = float(value)
+        return self.__opt_time >= 0
+
+    def __parse_opt_lower(self, value):
+        """
+        Parse opt-lower argument.
+        """
+        self.__optimize = True
+        self.__opt_lower = [int(x) for x in value.split(",")]
+        return True
+
+    def __parse_trace(self, value):
+        """
+        Parse trace argument.
+        """
+        self.__trace = value.lower()
+        return self.__trace in ["states", "delta", "json", "csv"]
+
     def __parse_istop(self, value):
         """
         Parse istop argument.
@@ -391,21 +990,10 @@ class Application:
         return True
 
     def print_model(self, model, printer):
-        table = {}
-        for sym in model.symbols(shown=True):
-            if sym.type == _clingo.SymbolType.Function and len(sym.arguments) > 0:
-                table.setdefault(sym.arguments[-1].number, []).append(_clingo.Function(sym.name, sym.arguments[:-1], sym.positive))
-        for step in range(self.__horizon+1):
-            symbols = table.get(step, [])
-            _sys.stdout.write(" State {}:".format(step))
-            sig = None
-            for sym in sorted(symbols):
-                if not sym.name.startswith('__'):
-                    if (sym.name, len(sym.arguments), sym.positive) != sig:
-                        _sys.stdout.write("\n ")
-                        sig = (sym.name, len(sym.arguments), sym.positive)
-                    _sys.stdout.write(" {}".format(sym))
-            _sys.stdout.write("\n")
+        if self.__trace == "states":
+            _sys.stdout.write(format_model(model, self.__horizon))
+        else:
+            _sys.stdout.write(format_trace(model, self.__horizon, self.__trace))
         return True
 
     def register_options(self, options):
@@ -418,6 +1006,43 @@ class Application:
         options.add(group, "istop", _textwrap.dedent("""\
             Stop criterion [sat]
                   <arg>: {sat|unsat|unknown}"""), self.__parse_istop)
+        options.add(group, "window", _textwrap.dedent("""\
+            Run receding horizon loop keeping <n> steps open
+                  before the horizon []"""), self.__parse_window, argument="<n>")
+        options.add(group, "transform-cache", "Reuse transformed programs stored in directory <dir> []", self.__parse_transform_cache, argument="<dir>")
+        options.add(group, "unsat-cache", _textwrap.dedent("""\
+            Record lengths proven unsatisfiable in directory <dir>
+                  and skip them when solving the same program again
+                  (ignored if the scheduler keeps the final state at
+                  the maximum length) []"""), self.__parse_unsat_cache, argument="<dir>")
+        options.add(group, "transform-jobs", "Transform input files using <n> processes [1]", self.__parse_transform_jobs, argument="<n>")
+        options.add(group, "body-engine", _textwrap.dedent("""\
+            Translation of temporal body formulas [eager]
+                  <arg>: {eager|lazy}
+                    eager: Add clauses as integrity constraints
+                    lazy : Add clauses when they propagate via a propagator"""), self.__parse_body_engine)
+        options.add(group, "trace", _textwrap.dedent("""\
+            Format of printed models [states]
+                  <arg>: {states|delta|json|csv}
+                    states: Print all atoms of each state
+                    delta : Print atoms added (+) and removed (-) per state
+                    json  : Print changes as JSON with a predicate dictionary
+                    csv   : Print changes as lines step,change,predicate,arguments"""), self.__parse_trace)
+        options.add(group, "opt-horizons", _textwrap.dedent("""\
+            Continue with longer horizons searching for cheaper models
+                  until <n> horizons have been solved since the first model []"""), self.__parse_opt_horizons, argument="<n>")
+        options.add(group, "opt-time", "Continue with longer horizons searching for cheaper models for <s> seconds []", self.__parse_opt_time, argument="<s>")
+        options.add(group, "opt-lower", _textwrap.dedent("""\
+            Continue with longer horizons searching for cheaper models
+                  until the cost reaches lower bound <c>[,<c>...]
+                  (requires --imax, --opt-horizons, or --opt-time) []"""), self.__parse_opt_lower, argument="<c>")
+        options.add_flag(group, "profile-translation", "Report translation costs of temporal formulas at exit", self.__profile)
+        options.add(group, "memory-report", _textwrap.dedent("""\
+            Report the memory held by the translation of temporal
+                  formulas every <n> steps []"""), self.__parse_memory_report, argument="<n>")
+        options.add(group, "heartbeat", _textwrap.dedent("""\
+            Append JSON progress records of running solve calls
+                  to <file> ('-' for stderr) every <s> seconds [10]"""), self.__parse_heartbeat, argument="<file>[,<s>]")
 
         # Scheduler algorithms
         group = "Scheduler Options"
@@ -436,6 +1061,9 @@ class Application:
         options.add(group, "scheduler-end,T", "Ending horizon length [3000]", lambda val: self.__parse_scheduler_greater_equal(val, "limit"), argument="<n>")
         options.add(group, "scheduler-verbose", "Set verbosity level to <n>", lambda val: self.__parse_scheduler_greater_equal(val, "verbose"), argument="<n>")
         options.add(group, "conflicts-per-restart,i", "Short for -r F,<n> (see restarts)", lambda val: self.__parse_scheduler_greater_equal(val, "conflicts_per_restart"), argument="<n>")
+        options.add(group, "portfolio", _textwrap.dedent("""Solve each length with a portfolio of <n> competing threads
+                                  using different heuristics and seeds [1]""")
+        , lambda val: self.__parse_scheduler_greater_equal(val, "portfolio", 1), argument="<n>")
         options.add(group, "keep-after-unsat", "After finding n to be UNSAT, do keep runs with m<n [t]", lambda val: self.__parse_scheduler_boolean(val, "propagate_unsat"), argument="<b>")
 
 
@@ -447,6 +1075,9 @@ class Application:
         options.add(group, "force-actions", _textwrap.dedent("""Force at least one action at time points before current plan length,
                                   using the predicate occurs/1 [f]""")
         , lambda val: self.__parse_scheduler_boolean(val, "force_actions"), argument="<b>")
+        options.add(group, "checkpoint", _textwrap.dedent("""Save the schedule to <file> every <s> seconds [60]
+                                  and resume from it if it exists""")
+        , self.__parse_checkpoint, argument="<file>[,<s>]")
 
     def main(self, prg, files):
         """
@@ -456,6 +1087,13 @@ class Application:
         clingo.clingo_main().
         """
         is_scheduler = self.__scheduler_config.single_scheduler()
+        if self.__profile.flag:
+            _ty.enable_profiling()
+        if self.__memory_report is not None:
+            _mem.enable(self.__memory_report)
+        if self.__heartbeat is not None:
+            path, interval = self.__heartbeat
+            _hb.enable(interval, _sys.stderr if path == "-" else open(path, "a"))
         with prg.builder() as b:
             files = [open(f) for f in files]
             if len(files) == 0:
@@ -482,16 +1120,55 @@ class Application:
                 if getattr(self.__scheduler_config, "force_actions", False):
                     program.append(force_actions_program)
 
-            future_sigs, program_parts = _tf.transform(program, b.add)
+            if self.__transform_cache is not None:
+                future_sigs, program_parts = _tf.transform_cached(program, b.add, self.__transform_cache, self.__transform_jobs)
+            else:
+                future_sigs, program_parts = _tf.transform(program, b.add, self.__transform_jobs)
+
+        # with the final state fixed at the maximum length, whether a length
+        # is unsatisfiable depends on the lengths grounded so far
+        cache = None
+        if self.__unsat_cache is not None and (not is_scheduler or self.__scheduler_config.move_final):
+            cache = _ch.UnsatCache(self.__unsat_cache, self.__unsat_cache_key(prg, program))
 
         if is_scheduler:
-            smain(prg, future_sigs, program_parts, self.__on_model, self.__imin, self.__imax, self.__istop, self.__scheduler_config)
+            checkpoint = _cp.Checkpoint(*self.__checkpoint) if self.__checkpoint is not None else None
+            smain(prg, future_sigs, program_parts, self.__on_model, self.__imin, self.__imax, self.__istop, self.__scheduler_config, self.__lazy, checkpoint, cache)
+        elif self.__window is not None:
+            wmain(prg, future_sigs, program_parts, self.__on_model, self.__window, self.__imax, self.__lazy)
+        elif self.__optimize:
+            omain(prg, future_sigs, program_parts, self.__on_model, self.__imin, self.__imax, self.__opt_horizons, self.__opt_time, self.__opt_lower, self.__lazy)
         else:
-            imain(prg, future_sigs, program_parts, self.__on_model, self.__imin, self.__imax, self.__istop)
+            imain(prg, future_sigs, program_parts, self.__on_model, self.__imin, self.__imax, self.__istop, self.__lazy, cache)
 
 
+def portfolio_arguments(args):
+    """
+    Returns the given command line arguments extended by clingo's
+    --parallel-mode option if they request a portfolio via --portfolio.
+
+    The threads of a control object have to be requested when it is created,
+    which happens before the options of the application are parsed. If the
+    arguments already set the threads via --parallel-mode or -t, they are
+    returned unchanged.
+    """
+    portfolio = None
+    for i, arg in enumerate(args):
+        if arg.startswith("--parallel-mode") or arg.startswith("-t"):
+            return args
+        elif arg.startswith("--portfolio="):
+            portfolio = arg[len("--portfolio="):]
+        elif arg == "--portfolio" and i+1 < len(args):
+            portfolio = args[i+1]
+    if portfolio is not None and portfolio.isdigit() and int(portfolio) > 1:
+        return args + ["--parallel-mode={},compete".format(portfolio)]
+    return args
+
 def main():
     """
     Run the telingo application.
     """
-    _sys.exit(int(_clingo.clingo_main(Application("telingo"), _sys.argv[1:])))
+    _sys.exit(int(_clingo.clingo_main(Application("telingo"), portfolio_arguments(_sys.argv[1:]))))
+
+# the planner builds on the functions above
+from .planner import Planner, Plan
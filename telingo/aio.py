@@ -0,0 +1,189 @@
+"""
+This module implements an asyncio interface to the incremental planner.
+
+Grounding and translating a horizon runs in an executor and solving uses an
+asynchronous solve handle of clingo, so that the event loop is never blocked.
+All methods return asyncio futures, which can be awaited in coroutines:
+
+  planner = AsyncPlanner(Planner(["encoding.lp", "instance.lp"]))
+  result, plans = await planner.step(timeout=10)
+  plans = await planner.solve(imax=20)
+
+Cancelling a returned future interrupts the running solve call. Requires
+Python 3.
+
+Classes:
+AsyncPlanner -- Planner returning futures.
+"""
+
+from .planner import Plan, _decode
+
+import asyncio as _asyncio
+
+class AsyncPlanner:
+    """
+    Wraps a planner returning asyncio futures.
+
+    The wrapped planner must not be used directly while a step is running.
+
+    Members:
+    __planner  -- The wrapped planner.
+    __loop     -- Event loop to create futures for.
+    __executor -- Executor to ground in (None for the default executor).
+    __handle   -- Handle of the running solve call (or None).
+    __running  -- Whether a step is running.
+    __result   -- Result of the last solve call.
+    """
+    def __init__(self, planner, loop=None, executor=None):
+        """
+        Initializes the planner.
+
+        Arguments:
+        planner  -- Planner to wrap.
+        loop     -- Event loop (the current loop by default).
+        executor -- Executor to ground in (the loop's default by default).
+        """
+        self.__planner  = planner
+        self.__loop     = loop if loop is not None else _asyncio.get_event_loop()
+        self.__executor = executor
+        self.__handle   = None
+        self.__running  = False
+        self.__result   = None
+
+    @property
+    def planner(self):
+        """
+        The wrapped planner.
+        """
+        return self.__planner
+
+    @property
+    def result(self):
+        """
+        Result of the last solve call (or None).
+        """
+        return self.__result
+
+    def step(self, timeout=None):
+        """
+        Grounds and solves the next horizon.
+
+        Returns a future holding a pair of the solve result and the list of
+        plans found. If the timeout (in seconds) expires, the solve call is
+        interrupted and the result is unknown.
+
+        Arguments:
+        timeout -- Number of seconds after which solving is interrupted.
+        """
+        if self.__running:
+            raise RuntimeError("a step is already running")
+        self.__running = True
+        future = self.__loop.create_future()
+        future.add_done_callback(self.__done)
+        grounded = self.__loop.run_in_executor(self.__executor, self.__planner._advance)
+        grounded.add_done_callback(lambda g: self.__start(g, future, timeout))
+        return future
+
+    def __done(self, future):
+        """
+        Interrupts the running solve call if the future has been cancelled.
+        """
+        if future.cancelled():
+            self.cancel()
+
+    def __start(self, grounded, future, timeout):
+        """
+        Starts solving once grounding is done.
+        """
+        if future.cancelled():
+            self.__running = False
+            return
+        if grounded.cancelled() or grounded.exception() is not None:
+            self.__running = False
+            if grounded.cancelled():
+                future.cancel()
+            else:
+                future.set_exception(grounded.exception())
+            return
+        step, assumptions = grounded.result()
+        plans = []
+        loop = self.__loop
+
+        def on_model(m):
+            # models are only valid during the callback
+            plans.append(Plan(step, _decode(m, step), list(m.cost)))
+
+        def on_finish(ret):
+            loop.call_soon_threadsafe(finish, ret)
+
+        def finish(ret):
+            if timer is not None:
+                timer.cancel()
+            # leaving the context releases the handle of the finished call
+            with self.__handle:
+                pass
+            self.__handle, self.__running, self.__result = None, False, ret
+            if not future.done():
+                future.set_result((ret, plans))
+
+        timer = None
+        self.__handle = self.__planner._solve(assumptions, on_model=on_model, on_finish=on_finish, async_=True)
+        if timeout is not None:
+            timer = loop.call_later(timeout, self.cancel)
+
+    def solve(self, imin=0, imax=None, istop="SAT", timeout=None):
+        """
+        Runs the incremental solving loop like Planner.solve.
+
+        Returns a future holding the list of plans found. The loop stops
+        early if solving a horizon is interrupted because of the timeout.
+        Cancelling the future interrupts the loop.
+
+        Arguments:
+        imin    -- Minimum number of iterations.
+        imax    -- Maximum number of iterations.
+        istop   -- When to stop.
+        timeout -- Number of seconds after which solving a horizon is
+                   interrupted.
+        """
+        future = self.__loop.create_future()
+        future.add_done_callback(self.__done)
+        plans = []
+
+        def running(ret):
+            step = self.__planner.horizon + 1
+            return ((imax is None or step < imax) and
+                    (ret is None or step < imin or (
+                        (istop == "SAT"     and not ret.satisfiable) or
+                        (istop == "UNSAT"   and not ret.unsatisfiable) or
+                        (istop == "UNKNOWN" and not ret.unknown))))
+
+        def next_step(ret):
+            if future.done():
+                return
+            if not running(ret) or (ret is not None and ret.interrupted):
+                future.set_result(plans)
+                return
+            self.step(timeout).add_done_callback(done)
+
+        def done(stepped):
+            if future.done():
+                return
+            if stepped.cancelled():
+                future.cancel()
+            elif stepped.exception() is not None:
+                future.set_exception(stepped.exception())
+            else:
+                ret, found = stepped.result()
+                plans.extend(found)
+                next_step(ret)
+
+        next_step(None)
+        return future
+
+    def cancel(self):
+        """
+        Interrupts the running solve call.
+        """
+        if self.__handle is not None:
+            self.__handle.cancel()
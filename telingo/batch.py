@@ -0,0 +1,136 @@
+"""
+This module implements solving many instances against one temporal encoding.
+
+The encoding is transformed and added to a control object once. Worker
+processes are then forked from the process holding this control object, so
+that each instance starts from a copy of it instead of parsing and
+transforming the encoding again. The facts of an instance are added in the
+worker before the first grounding step; since they can change every ground
+rule of the encoding, no part of the program is grounded before forking.
+
+One result per instance is written in the order of the instances as soon as
+it is available:
+
+  instance,status,length,time,error
+  inst1.lp,SAT,3,0.051,
+
+Functions:
+main -- Runs the batch solver.
+"""
+
+from . import transformers as _tf
+from . import imain as _imain
+
+import sys as _sys
+import csv as _csv
+import json as _json
+import time as _time
+import argparse as _argparse
+import multiprocessing as _mp
+import clingo as _clingo
+
+_g_state = None
+
+def _prepare(files, arguments):
+    """
+    Returns a control object holding the transformed encoding together with
+    the future signatures and program parts.
+    """
+    program = []
+    for name in files:
+        with open(name) as f:
+            program.append(f.read())
+    prg = _clingo.Control(arguments, message_limit=0)
+    with prg.builder() as b:
+        future_sigs, program_parts = _tf.transform(program, b.add)
+    return prg, future_sigs, program_parts
+
+def _initialize(files, arguments):
+    """
+    Prepares the state of a worker unless it has been inherited.
+    """
+    global _g_state
+    if _g_state is None:
+        _g_state = _prepare(files, arguments)
+
+def _run(task):
+    """
+    Solves one instance returning a dictionary describing the result.
+    """
+    name, imin, imax, istop = task
+    time0 = _time.time()
+    prg, future_sigs, program_parts = _g_state
+    horizon = [None]
+    def on_model(m, step):
+        horizon[0] = step
+    try:
+        with open(name) as f:
+            facts = f.read()
+        with prg.builder() as b:
+            _tf.transform_instance([facts], b.add)
+        ret = _imain(prg, future_sigs, program_parts, on_model, imin, imax, istop)
+        status = str(ret) if ret is not None else "UNKNOWN"
+        error = None
+    except Exception as e:
+        status, error = "ERROR", str(e)
+    result = {"instance": name, "status": status, "length": horizon[0], "time": round(_time.time() - time0, 3)}
+    if error is not None:
+        result["error"] = error
+    return result
+
+def _context():
+    """
+    Returns a multiprocessing context forking workers if possible.
+    """
+    try:
+        return _mp.get_context("fork")
+    except AttributeError:
+        return _mp
+    except ValueError:
+        return _mp.get_context()
+
+def main(args=None):
+    """
+    Runs the batch solver writing one result per instance.
+    """
+    global _g_state
+    parser = _argparse.ArgumentParser(prog="telingo.batch", description="Solve many instances against a temporal encoding.")
+    parser.add_argument("instances", nargs="+", help="instance files")
+    parser.add_argument("--encoding", action="append", required=True, metavar="FILE", help="encoding file (repeatable)")
+    parser.add_argument("--jobs", type=int, default=_mp.cpu_count(), help="number of worker processes [cores]")
+    parser.add_argument("--output", help="file to write results to [stdout]")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv", help="format of results [csv]")
+    parser.add_argument("--imin", type=int, default=0, help="minimum number of solving steps [0]")
+    parser.add_argument("--imax", type=int, help="maximum number of solving steps []")
+    parser.add_argument("--istop", choices=["SAT", "UNSAT", "UNKNOWN"], default="SAT", type=str.upper, help="stop criterion [SAT]")
+    parser.add_argument("--clingo", action="append", default=[], metavar="ARG", help="argument passed to clingo (repeatable)")
+    opts = parser.parse_args(args)
+
+    ctx = _context()
+    if getattr(ctx, "get_start_method", lambda: "fork")() == "fork":
+        _g_state = _prepare(opts.encoding, opts.clingo)
+
+    out = open(opts.output, "w") if opts.output is not None else _sys.stdout
+    try:
+        fields = ["instance", "status", "length", "time", "error"]
+        if opts.format == "csv":
+            writer = _csv.DictWriter(out, fields)
+            writer.writeheader()
+        tasks = [(name, opts.imin, opts.imax, opts.istop) for name in opts.instances]
+        # each worker solves one instance on its own copy of the control object
+        pool = ctx.Pool(max(1, opts.jobs), _initialize, (opts.encoding, opts.clingo), maxtasksperchild=1)
+        try:
+            for result in pool.imap(_run, tasks):
+                if opts.format == "csv":
+                    writer.writerow(result)
+                else:
+                    out.write(_json.dumps(result, sort_keys=True) + "\n")
+                out.flush()
+        finally:
+            pool.terminate()
+    finally:
+        if out is not _sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+This module implements a persistent cache of the results of solve calls.
+
+For a program identified by a key, the cache records the lengths proven
+unsatisfiable. Satisfiable and interrupted solve calls are not recorded.
+Entries are stored as JSON files named after the key in a cache directory
+and merged with the entry on disk when saved, so that several runs can share
+a cache directory.
+
+Classes:
+UnsatCache -- Cache of the results of solve calls for one program.
+"""
+
+import os as _os
+import json as _json
+import tempfile as _tempfile
+
+class UnsatCache:
+    """
+    Cache of the results of solve calls for one program.
+
+    Members:
+    __path  -- Path of the cache entry.
+    __bound -- Length up to which all lengths are proven unsatisfiable.
+    __unsat -- Set of further lengths proven unsatisfiable.
+    """
+    def __init__(self, directory, key):
+        """
+        Initializes the cache loading the entry for the given key.
+
+        Arguments:
+        directory -- The cache directory.
+        key       -- String identifying the program.
+        """
+        self.__path  = _os.path.join(directory, key + ".unsat.json")
+        self.__bound = 0
+        self.__unsat = set()
+        self.__load()
+
+    def __load(self):
+        try:
+            with open(self.__path) as f:
+                entry = _json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        self.__bound = max(self.__bound, entry["bound"])
+        self.__unsat.update(entry["unsat"])
+
+    @property
+    def unsat_bound(self):
+        """
+        Length up to which all lengths are proven unsatisfiable.
+        """
+        while self.__bound in self.__unsat:
+            self.__bound += 1
+        return self.__bound
+
+    def unsatisfiable(self, length):
+        """
+        Returns whether the given length is proven unsatisfiable.
+        """
+        return length < self.__bound or length in self.__unsat
+
+    def add(self, length, ret):
+        """
+        Records the result of solving the given length.
+        """
+        if ret.unsatisfiable:
+            self.__unsat.add(length)
+
+    def save(self):
+        """
+        Writes the cache entry merging it with the one on disk.
+
+        Errors writing the entry are ignored.
+        """
+        directory = _os.path.dirname(self.__path)
+        self.__load()
+        bound = self.unsat_bound
+        entry = {"bound": bound,
+                 "unsat": sorted(x for x in self.__unsat if x >= bound)}
+        try:
+            if not _os.path.isdir(directory):
+                _os.makedirs(directory)
+            fd, tmp = _tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with _os.fdopen(fd, "w") as f:
+                _json.dump(entry, f)
+            _os.rename(tmp, self.__path)
+        except (IOError, OSError):
+            pass
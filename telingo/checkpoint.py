@@ -0,0 +1,68 @@
+"""
+This module implements checkpoints persisting the state of scheduled runs.
+
+A checkpoint is a pickled dictionary holding the scheduler object and the
+counters of the solving loop. It is written atomically, so that a preempted
+run leaves either the previous or the new checkpoint behind.
+
+Classes:
+Checkpoint -- File holding the state of a scheduled run.
+"""
+
+import os as _os
+import time as _time
+import pickle as _pickle
+
+class Checkpoint:
+    """
+    File holding the state of a scheduled run.
+
+    Members:
+    __path     -- Path of the checkpoint file.
+    __interval -- Minimum number of seconds between two saves.
+    __saved    -- Time of the last save.
+    """
+    def __init__(self, path, interval=60):
+        """
+        Initializes the checkpoint.
+
+        Arguments:
+        path     -- Path of the checkpoint file.
+        interval -- Minimum number of seconds between two saves.
+        """
+        self.__path     = path
+        self.__interval = interval
+        self.__saved    = _time.time()
+
+    def load(self):
+        """
+        Returns the saved state or None if there is no checkpoint file.
+        """
+        if not _os.path.exists(self.__path):
+            return None
+        with open(self.__path, "rb") as f:
+            return _pickle.load(f)
+
+    def save(self, state, force=False):
+        """
+        Saves the given state if the interval has passed since the last save.
+
+        Arguments:
+        state -- Dictionary to save.
+        force -- Whether to save regardless of the interval.
+        """
+        now = _time.time()
+        if not force and now - self.__saved < self.__interval:
+            return
+        tmp = self.__path + ".tmp"
+        with open(tmp, "wb") as f:
+            _pickle.dump(state, f, 2)
+        getattr(_os, "replace", _os.rename)(tmp, self.__path)
+        self.__saved = now
+
+    def remove(self):
+        """
+        Removes the checkpoint file once the run is finished.
+        """
+        if _os.path.exists(self.__path):
+            _os.remove(self.__path)
@@ -0,0 +1,116 @@
+"""
+This module implements an opt-in progress channel reporting on running solve
+calls.
+
+If enabled, solve calls run asynchronously and, while waiting for them, a
+record is emitted every given number of seconds. Records are dictionaries
+written as JSON lines to a stream or passed to a callback:
+
+  {"event": "beat", "time": 1700000000.0, "horizon": 12, "elapsed": 30.0, "models": 0, "queue": [12, 17]}
+
+Events are "start" and "beat" while solving and "end" once a solve call
+finished. Only "end" records hold the result and the choices, conflicts, and
+restarts of the call because clingo publishes its statistics only at the end
+of a solve call. The queue holds the lengths waiting in the scheduler (if
+any).
+
+Functions:
+enable -- Starts emitting heartbeat records.
+"""
+
+import sys as _sys
+import json as _json
+import time as _time
+
+"""
+The heartbeat enabled by enable (or None).
+"""
+monitor = None
+
+class Heartbeat:
+    """
+    Emits records about running solve calls.
+
+    Members:
+    __interval -- Number of seconds between records.
+    __emit     -- Function called with each record.
+    __queue    -- Lengths waiting in the scheduler (or None).
+    """
+    def __init__(self, interval, emit):
+        """
+        Initializes the heartbeat.
+
+        Arguments:
+        interval -- Number of seconds between records.
+        emit     -- Function called with each record.
+        """
+        self.__interval = interval
+        self.__emit     = emit
+        self.__queue    = None
+
+    def set_queue(self, queue):
+        """
+        Sets the lengths waiting in the scheduler reported with each record.
+        """
+        self.__queue = list(queue)
+
+    def __record(self, event, horizon, start, models, **kwargs):
+        now = _time.time()
+        record = {"event": event, "time": now, "horizon": horizon, "elapsed": now - start, "models": models[0]}
+        if self.__queue is not None:
+            record["queue"] = self.__queue
+        record.update(kwargs)
+        self.__emit(record)
+
+    def solve(self, prg, horizon, on_model=None, **kwargs):
+        """
+        Solves asynchronously emitting records until the solve call finishes.
+
+        Returns the solve result.
+
+        Arguments:
+        prg      -- Control object to solve with.
+        horizon  -- Horizon reported with the records.
+        on_model -- Callback for intercepting models.
+        kwargs   -- Further arguments passed to the solve call.
+        """
+        start, models = _time.time(), [0]
+        def intercept(m):
+            models[0] += 1
+            if on_model is not None:
+                return on_model(m)
+        self.__record("start", horizon, start, models)
+        with prg.solve(on_model=intercept, async_=True, **kwargs) as handle:
+            while not handle.wait(self.__interval):
+                self.__record("beat", horizon, start, models)
+            ret = handle.get()
+        stats = {}
+        try:
+            solvers = prg.statistics["solving"]["solvers"]
+            for key in ["choices", "conflicts", "restarts"]:
+                stats[key] = int(solvers[key])
+        except (KeyError, RuntimeError):
+            pass
+        self.__record("end", horizon, start, models, result=str(ret), **stats)
+        return ret
+
+def enable(interval=10, out=None, callback=None):
+    """
+    Starts emitting heartbeat records every interval seconds.
+
+    Records are written as JSON lines to the given stream (standard error by
+    default) or, if given, passed to the callback instead.
+
+    Arguments:
+    interval -- Number of seconds between records.
+    out      -- Stream to write records to.
+    callback -- Function called with each record.
+    """
+    global monitor
+    if callback is None:
+        out = out if out is not None else _sys.stderr
+        def callback(record):
+            out.write(_json.dumps(record, sort_keys=True) + "\n")
+            out.flush()
+    monitor = Heartbeat(interval, callback)
+    return monitor
@@ -0,0 +1,135 @@
+"""
+This module implements an opt-in report of the memory held by the data
+structures of telingo.
+
+Memory is accounted explicitly per data structure of the theory translation:
+the formula dictionary with its formulas, the step data of body formulas,
+the literals of head formulas, the todo list, and the nogoods of the lazy
+propagator. Sizes are shallow sizes as reported by sys.getsizeof, so objects
+shared with clingo, like symbols, are not included. Memory allocated by
+clingo itself is not accounted; instead, the size of the ground program and
+the resident set size of the process are reported, which bound the memory
+held by clingo. A report line is written to standard error every given number
+of steps:
+
+  Memory Step 10: formulas=12.3MB steps=4.5MB head=0.1MB ... rss=512.0MB atoms=1234 rules=5678
+
+The current resident set size is read from /proc/self/statm. If it is not
+available, the peak resident set size is reported as peak_rss instead.
+
+Functions:
+sizeof  -- Returns the shallow size of objects.
+enable  -- Starts reporting memory.
+disable -- Stops reporting memory.
+"""
+
+import os as _os
+import sys as _sys
+
+try:
+    import resource as _resource
+except ImportError:
+    _resource = None
+
+"""
+The monitor enabled by enable (or None).
+"""
+monitor = None
+
+def sizeof(*objects):
+    """
+    Returns the number of bytes of the given objects including their attribute
+    dictionaries but not the objects they refer to.
+    """
+    size = 0
+    for x in objects:
+        size += _sys.getsizeof(x)
+        if hasattr(x, "__dict__"):
+            size += _sys.getsizeof(x.__dict__)
+    return size
+
+def _rss():
+    """
+    Returns a pair of a label and the resident set size of the process in
+    bytes or None if it cannot be determined.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return "rss", int(f.read().split()[1]) * _os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+    if _resource is not None:
+        # kilobytes on Linux but bytes on macOS
+        rss = _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+        return "peak_rss", rss * (1 if _sys.platform == "darwin" else 1024)
+    return None
+
+class MemoryMonitor:
+    """
+    Writes memory reports every given number of steps.
+
+    Members:
+    __interval -- Number of steps between reports.
+    __out      -- Stream to write reports to.
+    __reported -- Last step reported (None before the first report).
+    """
+    def __init__(self, interval, out):
+        """
+        Initializes the monitor.
+
+        Arguments:
+        interval -- Number of steps between reports.
+        out      -- Stream to write reports to.
+        """
+        self.__interval = interval
+        self.__out      = out
+        self.__reported = None
+
+    def step(self, step, prg, usage=None):
+        """
+        Writes a report if at least interval steps have passed since the last
+        one.
+
+        Arguments:
+        step  -- Step just translated.
+        prg   -- Control object holding the ground program.
+        usage -- Function returning a list of pairs of data structures and
+                 their sizes in bytes (or None).
+        """
+        if self.__reported is not None and step < self.__reported + self.__interval:
+            return
+        self.__reported = step
+        pairs = usage() if usage is not None else []
+        rss = _rss()
+        if rss is not None:
+            pairs.append(rss)
+        parts = ["{}={:.1f}MB".format(name, size / 1048576.) for name, size in pairs]
+        try:
+            lp = prg.statistics["problem"]["lp"]
+            parts.append("atoms={:.0f} rules={:.0f}".format(lp["atoms"], lp["rules"]))
+        except (KeyError, RuntimeError):
+            pass
+        self.__out.write("Memory Step {}: {}\n".format(step, " ".join(parts)))
+        self.__out.flush()
+
+def enable(interval=1, out=None):
+    """
+    Starts reporting memory every interval steps to the given stream (standard
+    error by default).
+
+    Only theories created afterward report memory.
+
+    Arguments:
+    interval -- Number of steps between reports.
+    out      -- Stream to write reports to.
+    """
+    global monitor
+    monitor = MemoryMonitor(interval, out if out is not None else _sys.stderr)
+    return monitor
+
+def disable():
+    """
+    Stops reporting memory.
+    """
+    global monitor
+    monitor = None
@@ -0,0 +1,198 @@
+"""
+This module implements an API to embed telingo into Python programs.
+
+A planner holds a control object with a transformed temporal program. Its
+solve method extends the horizon incrementally like imain but, instead of
+calling back into the caller, returns a generator of plans:
+
+  planner = Planner(["encoding.lp", "instance.lp"], ["--opt-mode=opt"])
+  for plan in planner.solve(imax=20):
+      for step, state in enumerate(plan.states):
+          print(step, state)
+
+Classes:
+Plan    -- Model decoded into states.
+Planner -- Incremental planner.
+"""
+
+from . import transformers as _tf
+from . import theory as _ty
+from . import GroundingPlan, _future_assumptions
+
+import threading as _threading
+import clingo as _clingo
+from collections import namedtuple as _namedtuple
+
+"""
+Model decoded into states.
+
+Members:
+horizon -- The horizon the model was found at.
+states  -- List holding for each state the sorted list of shown symbols
+           without their time parameter.
+cost    -- Cost of the model.
+"""
+Plan = _namedtuple("Plan", ["horizon", "states", "cost"])
+
+def _decode(model, horizon):
+    """
+    Returns the shown symbols of a model grouped by state.
+
+    Symbols starting with two underscores are omitted.
+    """
+    states = [[] for _ in range(horizon+1)]
+    for sym in model.symbols(shown=True):
+        args = sym.arguments if sym.type == _clingo.SymbolType.Function else []
+        if len(args) > 0 and not sym.name.startswith('__') and args[-1].type == _clingo.SymbolType.Number:
+            step = args[-1].number
+            if 0 <= step <= horizon:
+                states[step].append(_clingo.Function(sym.name, args[:-1], sym.positive))
+    for state in states:
+        state.sort()
+    return states
+
+class Planner:
+    """
+    Incremental planner holding a control object with a temporal program.
+
+    Members:
+    __prg         -- Control object holding the program.
+    __future_sigs -- Signatures of future predicates.
+    __plan        -- Program parts to ground per step.
+    __theory      -- Theory to translate temporal formulas.
+    __horizon     -- Horizon grounded so far (-1 before the first step).
+    __result      -- Result of the last solve call.
+    __handle      -- Handle of the running solve call (or None).
+    __cancelled   -- Whether the running call to solve has been cancelled.
+    __lock        -- Lock protecting the handle.
+    """
+    def __init__(self, files=(), arguments=(), programs=(), lazy=False):
+        """
+        Initializes the planner transforming the given programs.
+
+        Arguments:
+        files     -- Files holding temporal programs.
+        arguments -- Command line arguments for the control object.
+        programs  -- Temporal programs given as strings.
+        lazy      -- Whether to add the clauses of temporal body formulas
+                     lazily via a propagator.
+        """
+        program = []
+        for name in files:
+            with open(name) as f:
+                program.append(f.read())
+        program.extend(programs)
+        self.__prg = _clingo.Control(list(arguments), message_limit=0)
+        with self.__prg.builder() as b:
+            self.__future_sigs, program_parts = _tf.transform(program, b.add)
+        self.__plan      = GroundingPlan(program_parts)
+        self.__theory    = _ty.Theory(lazy)
+        self.__horizon   = -1
+        self.__result    = None
+        self.__handle    = None
+        self.__cancelled = False
+        self.__lock      = _threading.Lock()
+
+    @property
+    def configuration(self):
+        """
+        Configuration of the control object, which can be modified between
+        solve calls, e.g., to set solve limits.
+        """
+        return self.__prg.configuration
+
+    @property
+    def horizon(self):
+        """
+        Horizon grounded so far.
+        """
+        return self.__horizon
+
+    @property
+    def result(self):
+        """
+        Result of the last solve call (or None).
+        """
+        return self.__result
+
+    def _advance(self):
+        """
+        Grounds and translates the next step moving the final state there.
+
+        Returns the step and the assumptions to solve it with.
+        """
+        step = self.__horizon + 1
+        if step > 0:
+            self.__prg.release_external(_clingo.Function("__final", [step-1]))
+            self.__prg.cleanup()
+        self.__prg.ground(self.__plan.step(step))
+        self.__theory.translate(step, self.__prg)
+        self.__prg.assign_external(_clingo.Function("__final", [step]), True)
+        self.__horizon = step
+
+        assumptions = _future_assumptions(self.__prg, self.__future_sigs, step)
+        return step, assumptions
+
+    def _solve(self, assumptions, **kwargs):
+        """
+        Starts a solve call under the given assumptions passing the keyword
+        arguments to the control object.
+        """
+        return self.__prg.solve(assumptions=assumptions, **kwargs)
+
+    def solve(self, imin=0, imax=None, istop="SAT"):
+        """
+        Returns a generator of the plans found by the incremental solving loop.
+
+        The loop continues with the horizon after the one grounded last, so
+        that calling solve again searches for longer plans. The solve result
+        of the last horizon is available via the result property afterward.
+
+        Calling cancel after solve returned stops the generator, even if no
+        plan has been requested from it yet.
+
+        Arguments:
+        imin  -- Minimum number of iterations.
+        imax  -- Maximum number of iterations.
+        istop -- When to stop.
+        """
+        self.__cancelled = False
+        return self.__solve(imin, imax, istop)
+
+    def __solve(self, imin, imax, istop):
+        """
+        Generator implementing solve.
+        """
+        step, ret = self.__horizon + 1, None
+        while ((imax is None or step < imax) and not self.__cancelled and
+               (ret is None or step < imin or (
+                  (istop == "SAT"     and not ret.satisfiable) or
+                  (istop == "UNSAT"   and not ret.unsatisfiable) or
+                  (istop == "UNKNOWN" and not ret.unknown)))):
+            step, assumptions = self._advance()
+            with self._solve(assumptions, yield_=True) as handle:
+                with self.__lock:
+                    self.__handle = handle
+                    if self.__cancelled:
+                        handle.cancel()
+                try:
+                    for m in handle:
+                        yield Plan(step, _decode(m, step), list(m.cost))
+                    ret = handle.get()
+                finally:
+                    with self.__lock:
+                        self.__handle = None
+            self.__result = ret
+            step += 1
+
+    def cancel(self):
+        """
+        Cancels the running call to solve.
+
+        Can be called from another thread. The generator returned by solve
+        stops after the current solve call has been interrupted.
+        """
+        with self.__lock:
+            self.__cancelled = True
+            if self.__handle is not None:
+                self.__handle.cancel()
@@ -9,6 +9,126 @@ C_Scheduler -- Scheduler class for algorithm C.
 """
 
 import sys as _sys
+import heapq as _heapq
+from collections import deque as _deque
+
+class _Queue:
+    """
+    FIFO queue of runs shared by the schedulers.
+
+    Appending and popping runs takes constant time. Ordered queues (holding
+    lengths) additionally support removing all lengths below a bound in
+    O(log n) time per removed length: lengths are also kept in a heap and
+    removed lengths are only marked in the deque, so that they are skipped
+    once they reach its front. The deque and the heap are rebuilt once they
+    hold more than twice the number of queued runs.
+
+    Members:
+    __runs    -- Deque of runs including removed ones.
+    __ordered -- Whether the runs are lengths that can be removed by bound.
+    __heap    -- Heap of lengths that might still be queued.
+    __popped  -- Map from lengths to the number of times they have been
+                 popped but are still in the heap.
+    __removed -- Map from lengths to the number of times they have been
+                 removed but are still in the deque.
+    __size    -- Number of queued runs.
+    """
+    def __init__(self, runs=(), ordered=False):
+        """
+        Initializes the queue with the given runs.
+
+        Arguments:
+        runs    -- Initial runs.
+        ordered -- Whether the runs are lengths that can be removed by bound.
+        """
+        self.__runs    = _deque()
+        self.__ordered = ordered
+        self.__heap    = []
+        self.__popped  = {}
+        self.__removed = {}
+        self.__size    = 0
+        for run in runs:
+            self.append(run)
+
+    def __len__(self):
+        return self.__size
+
+    def __iter__(self):
+        removed = dict(self.__removed)
+        for run in self.__runs:
+            if removed.get(run, 0) > 0:
+                removed[run] -= 1
+            else:
+                yield run
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __skip(self):
+        """
+        Drops removed lengths from the front of the deque.
+        """
+        while self.__removed and self.__runs and self.__removed.get(self.__runs[0], 0) > 0:
+            run = self.__runs.popleft()
+            self.__removed[run] -= 1
+            if self.__removed[run] == 0:
+                del self.__removed[run]
+
+    def __compact(self):
+        """
+        Rebuilds the deque and the heap from the queued runs.
+        """
+        self.__runs    = _deque(self)
+        self.__heap    = list(self.__runs)
+        self.__popped  = {}
+        self.__removed = {}
+        _heapq.heapify(self.__heap)
+
+    @property
+    def first(self):
+        """
+        The run at the front of the queue.
+        """
+        self.__skip()
+        return self.__runs[0]
+
+    def append(self, run):
+        """
+        Appends a run to the queue.
+        """
+        self.__runs.append(run)
+        self.__size += 1
+        if self.__ordered:
+            _heapq.heappush(self.__heap, run)
+            if len(self.__heap) > 2 * self.__size + 16:
+                self.__compact()
+
+    def popleft(self):
+        """
+        Removes and returns the run at the front of the queue.
+        """
+        self.__skip()
+        run = self.__runs.popleft()
+        self.__size -= 1
+        if self.__ordered:
+            self.__popped[run] = self.__popped.get(run, 0) + 1
+        return run
+
+    def remove_below(self, bound):
+        """
+        Removes all lengths below the given bound from an ordered queue.
+        """
+        while self.__heap and self.__heap[0] < bound:
+            run = _heapq.heappop(self.__heap)
+            if self.__popped.get(run, 0) > 0:
+                self.__popped[run] -= 1
+                if self.__popped[run] == 0:
+                    del self.__popped[run]
+            else:
+                self.__removed[run] = self.__removed.get(run, 0) + 1
+                self.__size -= 1
+        if len(self.__runs) > 2 * self.__size + 16:
+            self.__compact()
 
 class Scheduler:
     """
@@ -28,6 +148,14 @@ class Scheduler:
         return 0
 
 
+    @property
+    def queue(self):
+        """
+        returns the lengths waiting to be solved, starting with the next one.
+        """
+        return []
+
+
 class A_Scheduler(Scheduler):
     """
     A_scheduler object contains the algorithm A to schedule solve steps.
@@ -55,7 +183,7 @@ class A_Scheduler(Scheduler):
         self.__limit           = limit
         self.__size            = size
         self.__propagate_unsat = propagate_unsat
-        self.__runs            = []
+        self.__runs            = _Queue(ordered=True)
         self.__first           = True
         self.__nones           = set()
         self.__verbose         = verbose
@@ -71,22 +199,23 @@ class A_Scheduler(Scheduler):
         if self.__first:
             if self.__length < 0 or self.__limit < self.__length or self.__inc <= 0: return None
             self.__first  = False
-            self.__runs   = [self.__length+(i*self.__inc) for i in range(self.__size) ]
-            self.__runs   = [i for i in self.__runs if (i <= self.__limit and i >= self.__length) ]
-            if len(self.__runs) > 0: self.__length = self.__runs[-1]
+            runs          = [self.__length+(i*self.__inc) for i in range(self.__size) ]
+            runs          = [i for i in runs if (i <= self.__limit and i >= self.__length) ]
+            if len(runs) > 0: self.__length = runs[-1]
+            self.__runs   = _Queue(runs, ordered=True)
         # No more runs left
         elif len(self.__runs) == 0: return None
         # NONE: check if all Nones, enqueue, and pop
         elif result is None:
-            current_length = self.__runs[0]
+            current_length = self.__runs.first
             self.__nones.add(current_length)
             if len(self.__nones) == len(self.__runs): return None
             self.__runs.append(current_length)
-            self.__runs = self.__runs[1:]
+            self.__runs.popleft()
 
         # not NONE
         else:
-            current_length = self.__runs[0]
+            current_length = self.__runs.first
             if current_length in self.__nones:
                 self.__nones.remove(current_length)
 
@@ -97,7 +226,7 @@ class A_Scheduler(Scheduler):
             # UNSAT
             else:
                 if self.__propagate_unsat:
-                    self.__runs = [i for i in self.__runs if i >= current_length]
+                    self.__runs.remove_below(current_length)
                 next_length = self.__length + self.__inc
                 if next_length <= self.__limit and not self.__nones:
                     self.__length = next_length
@@ -110,11 +239,30 @@ class A_Scheduler(Scheduler):
                         self.__runs.append(tmp)
                     self.__length = tmp
 
-            self.__runs = self.__runs[1:]
+            self.__runs.popleft()
 
         # log and return
         if self.__verbose: _sys.stdout.write("Queue:\t\t " + str(self.__runs) + "\n")
-        return self.__runs[0] if len(self.__runs) > 0 else None
+        return self.__runs.first if len(self.__runs) > 0 else None
+
+
+    @property
+    def queue(self):
+        """
+        returns the lengths waiting to be solved, starting with the next one.
+        """
+        return list(self.__runs)
+
+    @property
+    def verbose(self):
+        """
+        returns the verbosity level.
+        """
+        return self.__verbose
+
+    @verbose.setter
+    def verbose(self, value):
+        self.__verbose = value
 
 
 class B_Scheduler(Scheduler):
@@ -178,8 +326,8 @@ class B_Scheduler(Scheduler):
         self.__size            = size
         self.__propagate_unsat = propagate_unsat
         self.__gamma           = gamma
-        self.__runs            = []
-        self.__next_runs       = []
+        self.__runs            = _Queue()
+        self.__next_runs       = _Queue()
         self.__first           = True
         self.__nones           = set()
         self.__verbose         = verbose
@@ -198,7 +346,7 @@ class B_Scheduler(Scheduler):
         else:
             # No more runs left
             if len(self.__runs) == 0: return None
-            current = self.__runs[0]
+            current = self.__runs.first
 
             # NONE: append to __next_runs
             if result is None:
@@ -216,40 +364,41 @@ class B_Scheduler(Scheduler):
                     self.__next_runs.append(current)
                 # UNSAT and propagate: reset __next_runs
                 elif result.unsatisfiable and self.__propagate_unsat:
-                    self.__next_runs = []
+                    self.__next_runs = _Queue()
 
             # NONE, UNKNOWN or UNSAT: pop __runs
-            self.__runs = self.__runs[1:]
+            self.__runs.popleft()
             # move to __next_runs while not solve
-            while self.__runs != [] and not self.__runs[0].solve:
-                self.__next_runs.append(self.__runs[0])
-                self.__runs = self.__runs[1:]
+            while len(self.__runs) > 0 and not self.__runs.first.solve:
+                self.__next_runs.append(self.__runs.popleft())
 
 
         # if no more runs
-        if self.__runs == []:
+        if len(self.__runs) == 0:
 
-            # move pending runs to current runs
-            if self.__next_runs != []:
+            # move pending runs to current runs; the thresholds depend on
+            # the effort of the first run, so each pending run is visited
+            # once per cycle
+            if len(self.__next_runs) > 0:
                 if len(self.__nones) == len(self.__next_runs): return None
-                first = self.__next_runs[0]
+                first = self.__next_runs.popleft()
                 first.solve = True
-                self.__runs = [first]
+                self.__runs = _Queue([first])
                 # append runs, set solve if threshold is big enough
-                for i in self.__next_runs[1:]:
+                for i in self.__next_runs:
                     i.solve = True if (i.effort < (((first.effort+1) * (self.__gamma ** (i.index - first.index)))+0.5)) else False
                     self.__runs.append(i)
 
             # else: add new runs
             else:
                 if len(self.__runs) >= self.__size: return None
-                self.__runs = [self.Run(self.__index, self.__start+(self.__inc*self.__index), 0, True)]
+                self.__runs = _Queue([self.Run(self.__index, self.__start+(self.__inc*self.__index), 0, True)])
                 self.__index += 1
-                first = self.__runs[0]
+                first = self.__runs.first
                 if first.length > self.__limit: return None
 
             # reset __next_runs
-            self.__next_runs = []
+            self.__next_runs = _Queue()
 
             # add next runs
             while (((first.effort+1) * (self.__gamma ** (self.__index - first.index))) > 0.5) and not self.__nones:
@@ -263,7 +412,26 @@ class B_Scheduler(Scheduler):
         if self.__verbose:
             _sys.stdout.write("Queue:\t\t " + str(self.__runs) + "\n")
             _sys.stdout.write("Pending:\t " + str(self.__next_runs) + "\n")
-        return self.__runs[0].length
+        return self.__runs.first.length
+
+
+    @property
+    def queue(self):
+        """
+        returns the lengths waiting to be solved, starting with the next one.
+        """
+        return [run.length for run in list(self.__runs) + list(self.__next_runs)]
+
+    @property
+    def verbose(self):
+        """
+        returns the verbosity level.
+        """
+        return self.__verbose
+
+    @verbose.setter
+    def verbose(self, value):
+        self.__verbose = value
 
 
 class C_Scheduler(Scheduler):
@@ -290,7 +458,7 @@ class C_Scheduler(Scheduler):
         self.__inc             = float(inc)
         self.__limit           = limit
         self.__propagate_unsat = propagate_unsat
-        self.__runs            = []
+        self.__runs            = _Queue(ordered=True)
         self.__first           = True
         self.__nones           = set()
         self.__verbose         = verbose
@@ -306,21 +474,21 @@ class C_Scheduler(Scheduler):
         # START: add first run
         if self.__first:
             if self.__length < 0 or self.__limit < 0 or self.__inc < 1 or self.__length > self.__limit: return None
-            self.__runs = [self.__length]
+            self.__runs = _Queue([self.__length], ordered=True)
             #if self.__length == 0: self.__length = 1
             self.__first = False
 
         # NONE: check if all are None, append and pop
         elif result is None:
-            self.__nones.add(self.__runs[0])
+            self.__nones.add(self.__runs.first)
             if len(self.__nones) == len(self.__runs): return None
-            self.__runs.append(self.__runs[0])
-            self.__runs = self.__runs[1:]
+            self.__runs.append(self.__runs.first)
+            self.__runs.popleft()
 
         # ELSE: add new and handle last
         else:
             if len(self.__runs) == 0: return None
-            current_length = self.__runs[0]
+            current_length = self.__runs.first
             if current_length in self.__nones:
                 self.__nones.remove(current_length)
             next_length = self.__length * self.__inc
@@ -334,13 +502,32 @@ class C_Scheduler(Scheduler):
                 self.__runs.append(current_length)
             # UNSAT: propagate_unsat
             elif self.__propagate_unsat:
-                self.__runs = [ i for i in self.__runs if i >= current_length ]
+                self.__runs.remove_below(current_length)
             # pop
-            self.__runs = self.__runs[1:]
+            self.__runs.popleft()
 
         # log and return
         if self.__verbose: _sys.stdout.write("Queue:\t\t " + str(self.__runs) + "\n")
-        return self.__runs[0] if len(self.__runs) > 0 else None
+        return self.__runs.first if len(self.__runs) > 0 else None
+
+
+    @property
+    def queue(self):
+        """
+        returns the lengths waiting to be solved, starting with the next one.
+        """
+        return list(self.__runs)
+
+    @property
+    def verbose(self):
+        """
+        returns the verbosity level.
+        """
+        return self.__verbose
+
+    @verbose.setter
+    def verbose(self, value):
+        self.__verbose = value
 
 
 class Scheduler_Config:
@@ -356,6 +543,7 @@ class Scheduler_Config:
     limit					- ending horizon length [3000]
     restarts_per_solve		- number of restarts per solve [100]
     conflicts_per_restart	- number of conflicts per restarts [60]
+    portfolio				- number of solver threads per length [1]
     propagate-unsat			- after finding n to be UNSAT, do keep runs with m<n [t]
     move_final				- move final to current solving length, instead of maximum [t]
     forbid-actions			- forbid actions at time points after current plan length, using the predicate occurs/1 [f]
@@ -374,6 +562,7 @@ class Scheduler_Config:
         self.limit = 3000
         self.restarts_per_solve = 100
         self.conflicts_per_restart = 60
+        self.portfolio = 1
         self.propagate_unsat = True
         self.forbid_actions = False
         self.force_actions = False
@@ -390,6 +579,7 @@ class Scheduler_Config:
         string += "\tlimit: {}\n".format(self.limit)
         string += "\trestarts_per_solve: {}\n".format(self.restarts_per_solve)
         string += "\tconflicts_per_restart: {}\n".format(self.conflicts_per_restart)
+        string += "\tportfolio: {}\n".format(self.portfolio)
         string += "\tpropagate_unsat: {}\n".format(self.propagate_unsat)
         string += "\tforbid_actions: {}\n".format(self.forbid_actions)
         string += "\tforce_actions: {}\n".format(self.force_actions)
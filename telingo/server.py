@@ -0,0 +1,245 @@
+"""
+This module implements a long-lived server answering planning requests
+against a fixed temporal encoding.
+
+The encoding is parsed and transformed once when the server starts. Requests
+are JSON objects, one per line, read from standard input or a local socket.
+Each request is answered by one JSON object on a line of its own. A request
+has the following fields, of which only facts is mandatory:
+
+  {"id": 1, "facts": "init(a). goal(b).", "imin": 0, "imax": 20, "istop": "SAT"}
+
+The facts are added to the initial program part like the facts of an instance
+file given on the command line. The answer carries the id of the request, the
+result of the last solve call, the horizon it was obtained at, and the states
+of the last model in the format printed by telingo:
+
+  {"id": 1, "result": "SAT", "horizon": 3, "answer": " State 0:\\n ..."}
+
+Control objects are kept warm in a pool keyed by the facts of a request.
+Repeated requests for the same facts continue from the already grounded
+horizon and reuse the results obtained for shorter horizons.
+
+Classes:
+Session -- Control object holding the encoding and an instance.
+Server  -- Pool of sessions answering requests.
+
+Functions:
+main -- Runs the server.
+"""
+
+from . import transformers as _tf
+from . import theory as _ty
+from . import GroundingPlan, _solve, _future_assumptions, format_model
+
+import sys as _sys
+import json as _json
+import argparse as _argparse
+import clingo as _clingo
+from collections import OrderedDict as _OrderedDict
+
+try:
+    import socketserver as _socketserver
+except ImportError:
+    import SocketServer as _socketserver
+
+class Session:
+    """
+    Control object holding the transformed encoding and the facts of one
+    instance, which is grounded and solved incrementally.
+
+    Members:
+    __prg           -- Control object holding the program.
+    __theory        -- Theory to translate temporal formulas.
+    __future_sigs   -- Signatures of future predicates.
+    __plan          -- Program parts to ground per step.
+    __horizon       -- Horizon grounded so far (-1 before the first step).
+    __results       -- Solve results of the horizons solved so far.
+    """
+    def __init__(self, statements, future_sigs, program_parts, facts, arguments):
+        """
+        Initializes the session adding the encoding and the facts to a fresh
+        control object.
+
+        Arguments:
+        statements    -- Statements of the transformed encoding.
+        future_sigs   -- Signatures of future predicates.
+        program_parts -- Program parts to ground.
+        facts         -- Facts of the instance in string form.
+        arguments     -- Command line arguments for the control object.
+        """
+        self.__prg = _clingo.Control(arguments, message_limit=0)
+        with self.__prg.builder() as b:
+            for stm in statements:
+                b.add(stm)
+            _tf.transform_instance([facts], b.add)
+        self.__theory        = _ty.Theory()
+        self.__future_sigs   = future_sigs
+        self.__plan          = GroundingPlan(program_parts)
+        self.__horizon       = -1
+        self.__results       = []
+
+    def __ground(self, step):
+        """
+        Grounds and translates the given step moving the final state there.
+        """
+        if step > 0:
+            self.__prg.release_external(_clingo.Function("__final", [step-1]))
+            self.__prg.cleanup()
+        self.__prg.ground(self.__plan.step(step))
+        self.__theory.translate(step, self.__prg)
+        self.__prg.assign_external(_clingo.Function("__final", [step]), True)
+        self.__horizon = step
+
+    def solve(self, imin, imax, istop):
+        """
+        Runs the incremental solving loop as imain does.
+
+        Results for horizons below the grounded horizon are taken from
+        previous calls. Returns a triple of the last solve result, the horizon
+        it belongs to, and the formatted last model (or None). If the loop
+        stops at a satisfiable horizon below the grounded horizon, the model
+        cannot be recomputed and None is returned instead of the triple.
+
+        Arguments:
+        imin  -- Minimum number of iterations.
+        imax  -- Maximum number of iterations.
+        istop -- When to stop.
+        """
+        def running(step, ret):
+            return ((imax is None or step < imax) and
+                    (step == 0 or step < imin or (
+                        (istop == "SAT"     and not ret.satisfiable) or
+                        (istop == "UNSAT"   and not ret.unsatisfiable) or
+                        (istop == "UNKNOWN" and not ret.unknown))))
+
+        step, ret, answer = 0, None, []
+        while running(step, ret):
+            if step < self.__horizon:
+                ret = self.__results[step]
+                if not running(step+1, ret):
+                    if ret.satisfiable:
+                        return None
+                    del answer[:]
+                step += 1
+                continue
+            if step > self.__horizon:
+                self.__ground(step)
+            assumptions = _future_assumptions(self.__prg, self.__future_sigs, step)
+            def on_model(m, step=step):
+                answer[:] = [format_model(m, step)]
+            del answer[:]
+            ret = _solve(self.__prg, on_model, assumptions)
+            self.__results[step:] = [ret]
+            step += 1
+        return ret, step - 1, answer[0] if answer else None
+
+class Server:
+    """
+    Pool of warm sessions answering requests for one encoding.
+
+    Members:
+    __statements    -- Statements of the transformed encoding.
+    __future_sigs   -- Signatures of future predicates.
+    __program_parts -- Program parts to ground.
+    __arguments     -- Command line arguments for control objects.
+    __size          -- Maximum number of sessions kept.
+    __sessions      -- Sessions in least recently used order keyed by facts.
+    """
+    def __init__(self, files, arguments=(), size=4):
+        """
+        Initializes the server transforming the given encoding files.
+
+        Arguments:
+        files     -- Encoding files.
+        arguments -- Command line arguments for control objects.
+        size      -- Maximum number of sessions kept.
+        """
+        self.__statements = []
+        program = []
+        for name in files:
+            with open(name) as f:
+                program.append(f.read())
+        self.__future_sigs, self.__program_parts = _tf.transform(program, self.__statements.append)
+        self.__arguments = list(arguments)
+        self.__size      = size
+        self.__sessions  = _OrderedDict()
+
+    def __session(self, facts, fresh=False):
+        """
+        Returns the session for the given facts creating it if necessary.
+        """
+        session = self.__sessions.pop(facts, None)
+        if session is None or fresh:
+            session = Session(self.__statements, self.__future_sigs, self.__program_parts, facts, self.__arguments)
+        self.__sessions[facts] = session
+        while len(self.__sessions) > self.__size:
+            self.__sessions.popitem(last=False)
+        return session
+
+    def answer(self, request):
+        """
+        Answers the given request (a dictionary) returning a dictionary.
+        """
+        facts = request["facts"]
+        imin  = int(request.get("imin", 0))
+        imax  = request.get("imax")
+        imax  = None if imax is None else int(imax)
+        istop = str(request.get("istop", "SAT")).upper()
+        if imin < 0 or (imax is not None and imax < 0) or istop not in ["SAT", "UNSAT", "UNKNOWN"]:
+            raise ValueError("invalid request parameters")
+        ret = self.__session(facts).solve(imin, imax, istop)
+        if ret is None:
+            ret = self.__session(facts, True).solve(imin, imax, istop)
+        result, horizon, answer = ret
+        return {"result": str(result) if result is not None else None, "horizon": horizon, "answer": answer}
+
+    def handle(self, line):
+        """
+        Answers a request given as a JSON string returning a JSON string.
+        """
+        request = {}
+        try:
+            request = _json.loads(line)
+            response = self.answer(request)
+        except Exception as e:
+            response = {"error": str(e)}
+        response["id"] = request.get("id") if isinstance(request, dict) else None
+        return _json.dumps(response)
+
+class _Handler(_socketserver.StreamRequestHandler):
+    """
+    Answers the requests sent over a socket connection.
+    """
+    def handle(self):
+        for line in self.rfile:
+            line = line.decode("utf-8").strip()
+            if line:
+                self.wfile.write((self.server.telingo.handle(line) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+def main(args=None):
+    """
+    Runs the server reading requests from standard input or a socket.
+    """
+    parser = _argparse.ArgumentParser(prog="telingo.server", description="Answer planning requests for a temporal encoding.")
+    parser.add_argument("files", nargs="+", help="encoding files")
+    parser.add_argument("--pool", type=int, default=4, help="number of warm control objects [4]")
+    parser.add_argument("--socket", help="serve requests on the given unix socket instead of standard input")
+    parser.add_argument("--clingo", action="append", default=[], metavar="ARG", help="argument passed to clingo (repeatable)")
+    opts = parser.parse_args(args)
+
+    server = Server(opts.files, opts.clingo, opts.pool)
+    if opts.socket is not None:
+        srv = _socketserver.UnixStreamServer(opts.socket, _Handler)
+        srv.telingo = server
+        srv.serve_forever()
+    else:
+        for line in iter(_sys.stdin.readline, ""):
+            line = line.strip()
+            if line:
+                _sys.stdout.write(server.handle(line) + "\n")
+                _sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
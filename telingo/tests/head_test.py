@@ -98,3 +98,17 @@ class TestHead(TestCase):
             [ '#external __false(__t).'
             , '&__tel_head(__t) { >(>?(a)) :  } :- __aux_0(__t).'
             , 'a(__t) : 1<=(__t-__S) :- __aux_0(__S); __false(__t).']))
+
+    def test_transform_shared(self):
+        t = th.HeadTransformer()
+        def transform(s):
+            atom, rules = t.transform(parse_formula(s))
+            return (str(atom), [str(rule).replace(". [false]", ".") for rule in rules])
+        self.assertEqual(transform("p(X) | > q(X,Y)"), ('__aux_0(X,Y,__t)',
+            [ '#external __false(__t).'
+            , '&__tel_head(__t) { |(p(__V0),>(q(__V0,__V1))) :  } :- __aux_0(__V0,__V1,__t).'
+            , 'p(__V0,__t) : (__t-__S)<=0; q(__V0,__V1,__t) : 1<=(__t-__S), (__t-__S)<=1 :- __aux_0(__V0,__V1,__S); __false(__t).']))
+        self.assertEqual(transform("p(B) | > q(B,A)"), ('__aux_0(B,A,__t)', []))
+        self.assertEqual(transform("p(A) | > q(B,A)"), ('__aux_1(A,B,__t)',
+            [ '&__tel_head(__t) { |(p(__V0),>(q(__V1,__V0))) :  } :- __aux_1(__V0,__V1,__t).'
+            , 'p(__V0,__t) : (__t-__S)<=0; q(__V1,__V0,__t) : 1<=(__t-__S), (__t-__S)<=1 :- __aux_1(__V0,__V1,__S); __false(__t).']))
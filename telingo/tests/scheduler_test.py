@@ -596,6 +596,21 @@ class TestSchedulerC(TestCase):
         self.assertEqual(schedule(scheduler, list_exp([5, "UKN", 1, "UNSAT"])),
                          [0, 1, 0, 2, 1, 3, 0, 2, 1, 0])
 
+class TestQueue(TestCase):
+    """ class containing all tests for the queue shared by the schedulers. """
+    def test_remove_below(self):
+        """ tests for removing lengths below a bound. """
+        queue = _sd._Queue([5, 0, 10, 5], ordered=True)
+        self.assertEqual(queue.popleft(), 5)
+        queue.append(3)
+        queue.remove_below(5)
+        self.assertEqual((list(queue), len(queue), queue.first), ([10, 5], 2, 10))
+        for i in range(100):
+            queue.append(i)
+            queue.popleft()
+            queue.remove_below(i // 2)
+        self.assertEqual((list(queue), len(queue)), ([98, 99], 2))
+
 class TestSchedulerConfig(TestCase):
     """ class containing all tests for scheduler config. """
     def test_build(self):
@@ -620,6 +635,17 @@ class TestSchedulerConfig(TestCase):
         config.B = 0.5
         with self.assertRaises(Exception) as context:
             config.single_scheduler()
+    def test_queue(self):
+        """ tests for the lengths waiting in the queue. """
+        def queues(scheduler):
+            ret = [scheduler.queue]
+            for r in ["NONE", "UNKNOWN", "UNSAT"]:
+                scheduler.next(string_to_result(r))
+                ret.append(scheduler.queue)
+            return ret
+        self.assertEqual(queues(_sd.A_Scheduler(0, 5, 30, 3, True, 0)), [[], [0, 5, 10], [5, 10, 0], [10, 15, 20]])
+        self.assertEqual(queues(_sd.B_Scheduler(0, 5, 30, 3, True, 0.5, 0)), [[], [0], [0, 5], [5]])
+        self.assertEqual(queues(_sd.C_Scheduler(1, 2.0, 30, True, 0)), [[], [1], [2, 1], [4]])
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,18 @@ import sys
 import clingo
 import telingo
 import telingo.transformers as transformers
+import telingo.theory.body as body
+import telingo.theory.profiler as profiler
+import telingo.memory as memory
+import telingo.scheduler as scheduler
+import telingo.checkpoint as checkpoint
+import telingo.cache as cache
+import telingo.server as server
+import telingo.batch as batch
+import os
+import json
+import tempfile
+from collections import namedtuple
 
 class TestCase(unittest.TestCase):
     def assertRaisesRegex(self, *args, **kwargs):
@@ -20,16 +32,54 @@ def parse_model(m, s, dual):
         ret = [flip(sym) for sym in ret]
     return list(map(str, sorted(ret)))
 
-def solve(s, imin=0, dual=False, always=True):
+def solve(s, imin=0, dual=False, always=True, lazy=False, args=(), imax=20, main=telingo.imain, model=None, transform=transformers.transform, result=False, **kwargs):
     r = []
-    imax  = 20
-    prg = clingo.Control(['0'], message_limit=0)
+    inputs = s if isinstance(s, list) else [("#program always. " if always else "") + s]
+    if model is None:
+        model = lambda m, s: parse_model(m, s, dual)
+    if imin is not None:
+        kwargs["imin"] = imin
+    prg = clingo.Control(['0'] + list(args), message_limit=0)
     with prg.builder() as b:
-        future_sigs, reground_parts = transformers.transform([("#program always. " if always else "") + s], b.add)
-    telingo.imain(prg, future_sigs, reground_parts, lambda m, s: r.append(parse_model(m, s, dual)), imax=20, imin=imin)
-    return sorted(r)
+        future_sigs, reground_parts = transform(inputs, b.add)
+    ret = main(prg, future_sigs, reground_parts, lambda m, s: r.append(model(m, s)), imax=imax, lazy=lazy, **kwargs)
+    return (ret, r) if result else sorted(r)
+
+def psolve(inputs, directory=None, jobs=1):
+    if directory is not None:
+        transform = lambda inputs, add: transformers.transform_cached(inputs, add, directory, jobs)
+    else:
+        transform = lambda inputs, add: transformers.transform(inputs, add, jobs)
+    return solve(inputs, imin=3, imax=3, transform=transform)
+
+def trace(s, mode, imin=0):
+    return solve(s, imin=imin, model=lambda m, s: telingo.format_trace(m, s, mode))
+
+def osolve(s, imax=None, **kwargs):
+    return solve(s, imax=imax, main=telingo.omain, model=lambda m, s: (s, list(m.cost)), result=True, **kwargs)
+
+def wsolve(s, window, imax=5):
+    return solve(s, imin=None, imax=imax, main=telingo.wmain, window=window)
+
+COUNTER = "#program initial. c(0). #program dynamic. c(N+1) :- 'c(N). #program final. :- not c(3)."
+
+def ssolve(s, imax=None, checkpoint=None, **options):
+    config = scheduler.Scheduler_Config()
+    config.A, config.inc = 1, 1
+    for key, value in options.items():
+        setattr(config, key, value)
+    threads = ['--parallel-mode={},compete'.format(config.portfolio)] if config.portfolio > 1 else []
+    return solve(s, always=False, args=threads, imax=imax, main=telingo.smain, model=lambda m, s: s, result=True,
+                 scheduler_options=config, checkpoint=checkpoint)[1]
 
 class TestMain(TestCase):
+    def test_plan(self):
+        plan = telingo.GroundingPlan([("initial", "initial", range(0, 1)), ("always", "always", range(0, 1)), ("dynamic", "dynamic_1", range(1, 2))])
+        self.assertEqual(plan.step(0), [("initial", [0, 0]), ("always", [0, 0])])
+        self.assertEqual(plan.step(1), [("always", [1, 1])])
+        self.assertEqual(plan.step(2), [("always", [2, 2]), ("dynamic_1", [1, 2])])
+        self.assertEqual(plan.steps(0, 3), plan.step(0) + plan.step(1) + plan.step(2))
+
     def test_simple(self):
         self.assertEqual(solve("p."), [['p(0)']])
         self.assertEqual(solve("p :- q. {q}."), [[], ['p(0)', 'q(0)']])
@@ -201,6 +251,241 @@ class TestMain(TestCase):
         self.assertEqual(solve("{b}. a. #program initial. :- not &tel {b ;>: b}.", imin=2), [['a(0)', 'a(1)', 'b(0)', 'b(1)'], ['a(0)', 'b(0)']])
         self.assertEqual(solve("{b}. a. #program final. :- not &tel {b <:; b}.", imin=2), [['a(0)', 'a(1)', 'b(0)', 'b(1)'], ['a(0)', 'b(0)']])
 
+    def test_lazy(self):
+        for s, imin in [("{b}. a. #program initial. :- not &tel {b ;> b}.", 3),
+                        ("{b}. a. #program final. :- not &tel {b <; b <; b}.", 3),
+                        ("{b}. a. :- b, &tel { > >? b}.  #program final. :- not &tel {< < < b}.", 0),
+                        ("{p; q}. :- &tel { p <? q }, not p. #program final. :- not &tel { p <* q }.", 2),
+                        ("a. #program final. :- &tel { a & <* a }.", 2)]:
+            self.assertEqual(solve(s, imin=imin, lazy=True), solve(s, imin=imin))
+        # reduce the learnt constraints after every few conflicts
+        s = "{p(1..3)}. :- p(X), &tel { < p(X) }. :- &tel { p(1) & > p(2) & > > p(3) }. #program final. :- not &tel { <? p(1) }. :- not &tel { <* <? p(3) }."
+        args = ["--del-cfl=+,10,10"]
+        self.assertEqual(solve(s, imin=6, lazy=True, args=args), solve(s, imin=6, args=args))
+
+    def test_normalize(self):
+        formulas = {}
+        add = lambda x: formulas.setdefault(x._rep, x)
+        p = add(body.Atom("p"))
+        self.assertEqual(body.create_next(body.create_next(p, 1, False, add), 2, False, add)._rep, "(3>(p()))")
+        self.assertEqual(body.create_previous(body.create_previous(p, 1, True, add), 1, False, add)._rep, "(1<(1<:(p())))")
+        self.assertIs(body.create_negation(body.create_negation(p, add), add), p)
+        self.assertEqual(body.create_negation(body.create_next(body.create_negation(p, add), 1, True, add), add)._rep, "(1>(p()))")
+
+    def test_profiler(self):
+        class Formula:
+            def __init__(self, rep):
+                self._rep = rep
+        Term = namedtuple("Term", ["name"])
+        Atom = namedtuple("Atom", ["term", "elements"])
+        class Backend:
+            def add_atom(self):
+                return 1
+            def add_rule(self, head, body, choice=False):
+                pass
+        p = profiler.Profiler()
+        top, sub = Formula("(a&b)"), Formula("(b)")
+        p.label(top, Atom(Term("tel"), ["a&b"]))
+        b = p.backend(Backend())
+        p.enter(top)
+        p.enter(sub)
+        b.add_rule([], [1])
+        p.leave()
+        b.add_atom()
+        p.leave()
+        p.enter(sub)
+        p.leave()
+        lines = []
+        class Out:
+            def write(self, x):
+                lines.extend(x.splitlines())
+        p.report(Out())
+        rows = [line.split(None, 5) for line in lines if line and line[0] == " " and "time" not in line]
+        self.assertEqual(sorted((r[5], r[1:5]) for r in rows), [
+            ("&tel{ a&b }", ["2", "1", "1", "0"]),
+            ("Formula", ["3", "1", "1", "0"])])
+
+    def test_memory(self):
+        self.assertEqual(memory.sizeof([], {}), sys.getsizeof([]) + sys.getsizeof({}))
+        lines = []
+        class Out:
+            def write(self, x):
+                lines.append(x)
+            def flush(self):
+                pass
+        class Control:
+            statistics = {"problem": {"lp": {"atoms": 3.0, "rules": 5.0}}}
+        monitor = memory.enable(2, Out())
+        try:
+            for step in range(5):
+                monitor.step(step, Control(), lambda: [("formulas", 1048576)])
+            memory.enable(1, Out())
+            self.assertEqual(solve("{b}. :- not &tel { b & < b }, not &initial.", lazy=True), [[], ['b(0)']])
+        finally:
+            memory.disable()
+        self.assertIsNone(memory.monitor)
+        self.assertEqual([line.split(":")[0] for line in lines[:3]], ["Memory Step 0", "Memory Step 2", "Memory Step 4"])
+        self.assertIn(" formulas=1.0MB ", lines[0])
+        self.assertIn(" atoms=3 rules=5\n", lines[0])
+        self.assertEqual([x.split("=")[0] for x in lines[-1].split()[3:8]], ["formulas", "steps", "head", "todo", "nogoods"])
+
+    def test_heartbeat(self):
+        records = []
+        telingo.heartbeat.enable(callback=records.append)
+        try:
+            self.assertEqual(solve("p."), [['p(0)']])
+        finally:
+            telingo.heartbeat.monitor = None
+        self.assertEqual([(r["event"], r["horizon"], r["models"]) for r in records], [("start", 0, 0), ("end", 0, 1)])
+        self.assertEqual(records[-1]["result"], "SAT")
+        self.assertIn("conflicts", records[-1])
+
+    def test_checkpoint(self):
+        path = os.path.join(tempfile.mkdtemp(), "schedule")
+        cp = checkpoint.Checkpoint(path, 0)
+        self.assertEqual(ssolve(COUNTER, 2, checkpoint=cp), [])
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(cp.load()["step"], 2)
+        self.assertEqual(cp.load()["scheduler"].queue, [1])
+        self.assertRaises(RuntimeError, ssolve, COUNTER, 2, checkpoint=cp, processes=10)
+        self.assertEqual(ssolve(COUNTER, 2, checkpoint=cp, verbose=1), [])
+        self.assertEqual(cp.load()["scheduler"].verbose, 1)
+        self.assertEqual(ssolve(COUNTER, checkpoint=cp), [3])
+        self.assertFalse(os.path.exists(path))
+
+    def test_server(self):
+        path = os.path.join(tempfile.mkdtemp(), "encoding.lp")
+        with open(path, "w") as f:
+            f.write("#program dynamic. c(N+1) :- 'c(N). #program final. :- not c(3).")
+        srv = server.Server([path])
+        ret = json.loads(srv.handle('{"id": 1, "facts": "c(0)."}'))
+        self.assertEqual((ret["id"], ret["result"], ret["horizon"]), (1, "SAT", 3))
+        self.assertIn("c(3)", ret["answer"].split("State 3:")[1])
+        ret = json.loads(srv.handle('{"id": 2, "facts": "c(1)."}'))
+        self.assertEqual((ret["id"], ret["result"], ret["horizon"]), (2, "SAT", 2))
+        # answered from the results of the warm session
+        ret = json.loads(srv.handle('{"id": 3, "facts": "c(0).", "imax": 2}'))
+        self.assertEqual((ret["id"], ret["result"], ret["horizon"], ret["answer"]), (3, "UNSAT", 1, None))
+        ret = json.loads(srv.handle('{"id": 4, "facts": "c(1).", "imin": 4, "imax": 5, "istop": "sat"}'))
+        self.assertEqual((ret["id"], ret["result"], ret["horizon"]), (4, "UNSAT", 4))
+        # a satisfiable horizon below the grounded one needs a fresh session
+        ret = json.loads(srv.handle('{"id": 4, "facts": "c(1)."}'))
+        self.assertEqual((ret["id"], ret["result"], ret["horizon"]), (4, "SAT", 2))
+        self.assertIn("c(3)", ret["answer"].split("State 2:")[1])
+        self.assertIn("error", json.loads(srv.handle('{"id": 5}')))
+        self.assertEqual(json.loads(srv.handle('{"id": 6, "facts": "", "imin": -1}'))["id"], 6)
+
+    def test_batch(self):
+        directory = tempfile.mkdtemp()
+        def write(name, text):
+            path = os.path.join(directory, name)
+            with open(path, "w") as f:
+                f.write(text)
+            return path
+        encoding = write("encoding.lp", "#program dynamic. c(N+1) :- 'c(N). #program final. :- not c(3).")
+        instances = [write("sat.lp", "c(1)."), write("unsat.lp", "c(4).")]
+        output = os.path.join(directory, "results.json")
+        batch.main(instances + ["--encoding", encoding, "--jobs", "2", "--imax", "5", "--format", "json", "--output", output])
+        with open(output) as f:
+            results = [json.loads(line) for line in f]
+        self.assertEqual([(r["instance"], r["status"], r["length"]) for r in results], [(instances[0], "SAT", 2), (instances[1], "UNSAT", None)])
+
+    def test_portfolio(self):
+        self.assertEqual(telingo.portfolio_arguments(["a.lp", "--portfolio=3"]), ["a.lp", "--portfolio=3", "--parallel-mode=3,compete"])
+        self.assertEqual(telingo.portfolio_arguments(["--portfolio", "1"]), ["--portfolio", "1"])
+        self.assertEqual(telingo.portfolio_arguments(["--portfolio=3", "-t", "2"]), ["--portfolio=3", "-t", "2"])
+        self.assertEqual(telingo.portfolio_arguments(["--parallel-mode=4,split", "--portfolio=3"]), ["--parallel-mode=4,split", "--portfolio=3"])
+        prg = clingo.Control(["--parallel-mode=3,compete"], message_limit=0)
+        telingo.Solver(prg, telingo.theory.Theory(), 100, 60, True, 0, 3)
+        solver = prg.configuration.solver
+        self.assertEqual(len(solver), 3)
+        self.assertEqual([str(solver[i].heuristic).lower().split(",")[0] for i in range(3)], ["vsids", "berkmin", "vmtf"])
+        self.assertEqual([str(solver[i].seed) for i in range(3)], ["0", "1", "2"])
+        self.assertEqual([str(solver[i].restarts).lower().split(",")[:2] for i in range(3)], [["f", "60"]] * 3)
+        # a control object with a single thread only configures that thread
+        prg = clingo.Control([], message_limit=0)
+        telingo.Solver(prg, telingo.theory.Theory(), 100, 60, True, 0, 3)
+        self.assertEqual(str(prg.configuration.solver[0].heuristic).lower().split(",")[0], "vsids")
+        self.assertEqual(ssolve(COUNTER, portfolio=3), [3])
+        self.assertEqual(ssolve(COUNTER, portfolio=3, conflicts_per_restart=0), [3])
+
+    def test_unsat_cache(self):
+        def csolve(c):
+            records = []
+            telingo.heartbeat.enable(callback=records.append)
+            try:
+                r = solve(COUNTER, always=False, model=lambda m, s: s, cache=c)
+            finally:
+                telingo.heartbeat.monitor = None
+            return r, [x["horizon"] for x in records if x["event"] == "start"]
+        directory = tempfile.mkdtemp()
+        c = cache.UnsatCache(directory, "key")
+        self.assertEqual(csolve(c), ([3], [0, 1, 2, 3]))
+        self.assertEqual(c.unsat_bound, 3)
+        c = cache.UnsatCache(directory, "key")
+        self.assertEqual(c.unsat_bound, 3)
+        self.assertEqual(csolve(c), ([3], [3]))
+        self.assertEqual(cache.UnsatCache(directory, "other").unsat_bound, 0)
+
+    def test_trace(self):
+        self.assertEqual(trace("p. #program initial. q.", "delta", imin=2), [' State 0:\n  +p +q\n', ' State 0:\n  +p +q\n State 1:\n  -q\n'])
+        self.assertEqual(trace("p(a). #program initial. q.", "json"), ['{"predicates":["p/1","q/0"],"states":[{"add":[[0,"a"],[1,""]],"del":[]}]}\n'])
+        self.assertEqual(trace("p(a,b). #program initial. -q.", "csv"), ['0,+,p/2,"a,b"\n0,+,-q/0,\n'])
+
+    def test_optimize(self):
+        self.assertEqual(osolve("p.", imax=5), ([], [(0, [])]))
+        best, models = osolve("#program initial. {p; q}. :- not p, not q. :~ p. [2] :~ q. [1]", imax=5, horizons=2)
+        self.assertEqual(best, [1])
+        self.assertEqual(models[-1], (0, [1]))
+        best, models = osolve("#program initial. {p; q}. :- not p, not q. :~ p. [2] :~ q. [1]", imax=5, lower=[1])
+        self.assertEqual(best, [1])
+        self.assertEqual(models[-1], (0, [1]))
+        self.assertRaises(RuntimeError, osolve, "#program initial. {p; q}. :- not p, not q. :~ p. [2] :~ q. [1]", lower=[0])
+        best, models = osolve("#program initial. {p; q}. :- not p, not q. :~ p. [2] :~ q. [1]", time_limit=0, lower=[0])
+        self.assertEqual(best, [1])
+        self.assertEqual(models[-1], (0, [1]))
+
+    def test_planner(self):
+        planner = telingo.Planner(programs=["#program initial. p. #program always. q. #program final. :- &initial."])
+        plans = list(planner.solve(imax=5))
+        self.assertEqual([(plan.horizon, [list(map(str, state)) for state in plan.states]) for plan in plans], [(1, [['p', 'q'], ['q']])])
+        self.assertTrue(planner.result.satisfiable)
+        self.assertEqual(planner.horizon, 1)
+        plans = planner.solve(imax=5)
+        next(plans)
+        planner.cancel()
+        self.assertEqual([plan.horizon for plan in plans], [])
+        self.assertEqual(planner.horizon, 2)
+        plans = planner.solve(imax=5)
+        planner.cancel()
+        self.assertEqual(list(plans), [])
+        self.assertEqual(planner.horizon, 2)
+
+    @unittest.skipIf(sys.version_info[0] < 3, "asyncio requires Python 3")
+    def test_aio(self):
+        import asyncio
+        import telingo.aio as aio
+        loop = asyncio.new_event_loop()
+        try:
+            planner = aio.AsyncPlanner(telingo.Planner(programs=["#program initial. p. #program always. q. #program final. :- &initial."]), loop)
+            plans = loop.run_until_complete(planner.solve(imax=5))
+            self.assertEqual([(plan.horizon, [list(map(str, state)) for state in plan.states]) for plan in plans], [(1, [['p', 'q'], ['q']])])
+            ret, plans = loop.run_until_complete(planner.step())
+            self.assertTrue(ret.satisfiable)
+            self.assertEqual([plan.horizon for plan in plans], [2])
+        finally:
+            loop.close()
+
+    def test_transform_paths(self):
+        inputs = ["#program initial. &tel { >a | b } :- c. &tel { a >? b }. c.", "#program always. {d}."]
+        models = psolve(inputs)
+        self.assertIn(['b(0)', 'c(0)'], models)
+        self.assertEqual(psolve(inputs, jobs=2), models)
+        directory = tempfile.mkdtemp()
+        self.assertEqual(psolve(inputs, directory), models)
+        self.assertEqual(psolve(inputs, directory), models)
+        self.assertEqual(psolve(inputs, directory, 2), models)
+
     def test_assoc(self):
         self.assertEqual(solve("{b}. a. :- b, &tel { > >? b}.  #program final. :- not &tel {< 4 < b}."),
                          solve("{b}. a. :- b, &tel { > >? b}.  #program final. :- not &tel {< < < < < b}."))
@@ -330,3 +615,10 @@ class TestMain(TestCase):
             , ['b(0)']
             , ['b(0)', 'b(1)']
             ])
+
+    def test_window(self):
+        self.assertEqual(wsolve("p.", 1, 3), [['p(0)'], ['p(0)', 'p(1)'], ['p(0)', 'p(1)', 'p(2)']])
+        self.assertEqual(wsolve("{p}. :- not p, &final.", 0, 2), [['p(0)'], ['p(0)', 'p(1)']])
+        self.assertEqual(wsolve("{p}. :- not p, &final. :- p, 'p.", 0), [['p(0)']])
+        self.assertEqual(wsolve("{p}. :- not p, &final. :- p, 'p.", 1, 2), [['p(0)'], ['p(1)']])
+        self.assertEqual(wsolve("{p}. :- p, &final.", 0, 2), [[], []])
@@ -20,21 +20,22 @@ def create_formula(atom):
     return clause
 
 
-def theory_atoms(s):
+def theory_atoms(s, memo=None):
     ctl = clingo.Control()
     with ctl.builder() as b:
         tf.transform([s], b.add)
     ctl.ground([("initial", [0, 0]), ("always", [0, 0])])
     ret = []
     for x in ctl.theory_atoms:
-        ret.append(str(hd.translate_formula(x, lambda y: y)))
+        ret.append(str(hd.translate_formula(x, lambda y: y, memo)))
     ret.sort()
     return ret
 
 class TestTheoryHead(TestCase):
     def test_transform(self):
         self.assertEqual(theory_atoms("&tel { >a }."), ['(1>a)@0'])
-        self.assertEqual(theory_atoms("&tel { > >a }."), ['(1>(1>a))@0'])
+        self.assertEqual(theory_atoms("&tel { > >a }."), ['(2>a)@0'])
+        self.assertEqual(theory_atoms("&tel { > >:a }."), ['(1>(1>:a))@0'])
         self.assertEqual(theory_atoms("&tel { >>a }."), ['(>*((~__final)|a))@0'])
         self.assertEqual(theory_atoms("&tel { a>?b }."), ['(a>?b)@0'])
         self.assertEqual(theory_atoms("&tel { a>*b }."), ['(a>*b)@0'])
@@ -47,3 +48,9 @@ class TestTheoryHead(TestCase):
         self.assertEqual(theory_atoms("&tel { &false }."), ['&false@0'])
         self.assertEqual(theory_atoms("&tel { &initial }."), ['(~(~__initial))@0'])
         self.assertEqual(theory_atoms("&tel { a;b }."), ['(a|b)@0'])
+
+    def test_memo(self):
+        memo = {}
+        self.assertEqual(theory_atoms("&tel { a>?b(1) }. &tel { a&b(1) }.", memo), ['(a&b(1))@0', '(a>?b(1))@0'])
+        self.assertIn(("head", "b(1)"), memo)
+        self.assertIn(("symbol", "1"), memo)
@@ -1,5 +1,7 @@
 import unittest
 import sys
+import shutil
+import tempfile
 import clingo
 from clingo import ast
 import telingo.transformers as _tfs
@@ -75,7 +77,7 @@ def transform_program(p):
         if s is not None:
             ret.append(str(s))
     clingo.parse_program(p, lambda s: append(t.visit(s)))
-    return (ret, a, {key: [(str(r), str(l)) for r, l in stms] for key, stms in c.items()})
+    return (ret, a, {key: [str(r) for r in stms] for key, stms in c.items()})
 
 class TestClassify(TestCase):
     def test_constraint(self):
@@ -106,7 +108,16 @@ class TestProgramTransformer(TestCase):
         # simple rules
         self.assertEqual(transform_program("p."), (['#program initial(__t,__u).', 'p(__t).'], set(), {}))
         self.assertEqual(transform_program("p :- 'p."), (['#program initial(__t,__u).', 'p(__t) :- p((__t+-1)).'], set(), {}))
-        self.assertEqual(transform_program("p'."), (['#program initial(__t,__u).', '__future_p(1,(__t+1)).'], set([('p', 0, True, 1)]), {}))
+        self.assertEqual(transform_program("p'."), (['#program initial(__t,__u).'], set(), {('initial', 0): ['#false :- __final(__u).']}))
+        self.assertEqual(transform_program("#program always. p'(X) :- q(X)."), (
+            ['#program initial(__t,__u).', '#program always(__t,__u).', 'p(X,__t) :- q(X,(__t+-1)); __t>=1.'], set(),
+            {('always', 0): ['#false :- q(X,__t); __final(__u).']}))
+        self.assertEqual(transform_program("#program dynamic. p'' :- q, _r."), (
+            ['#program initial(__t,__u).', '#program dynamic(__t,__u).', 'p(__t) :- q((__t+-2)); r(0); __t>2.'], set(),
+            {('dynamic', 0): ['#false :- q(__t); r(0); __final(__u).'],
+             ('dynamic', 1): ['#false :- q(__t); r(0); __final(__u).']}))
+        self.assertEqual(transform_program("p' :- not &tel { a }."), (['#program initial(__t,__u).', '__future_p(1,(__t+1)) :- not &tel(__t) { a :  }.'], set([('p', 0, True, 1)]), {}))
+        self.assertEqual(transform_program("#program final. p' :- q."), (['#program initial(__t,__u).', '#program always(__t,__u).', '__future_p(1,(__t+1)) :- q(__t); __final(__t).'], set([('p', 0, True, 1)]), {}))
         self.assertRaisesRegex(RuntimeError, "past atoms not supported", transform_program, "'p.")
         self.assertRaisesRegex(RuntimeError, "future atoms not supported", transform_program, "p :- p'.")
         # body aggregates
@@ -135,20 +146,33 @@ class TestProgramTransformer(TestCase):
         self.assertEqual(transform_program(":- _p."), (['#program initial(__t,__u).', '#false :- p(0).'], set(), {}))
         self.assertEqual(transform_program(":- p'."), (
             ['#program initial(__t,__u).'], set(),
-            {('initial', 1): [('#false :- p((__t+1)); __final(__u).', '#false :- p((__t+1)).')]}))
+            {('initial', 1): ['#false :- p((__t+1)).']}))
         self.assertEqual(transform_program("not p :- p'."), (
             ['#program initial(__t,__u).'], set(),
-            {('initial', 1): [('not p(__t) :- p((__t+1)); __final(__u).', 'not p(__t) :- p((__t+1)).')]}))
+            {('initial', 1): ['not p(__t) :- p((__t+1)).']}))
         self.assertEqual(transform_program("not 'p :- p'."), (
             ['#program initial(__t,__u).'], set(),
-            {('initial', 1): [('not p((__t+-1)) :- p((__t+1)); __final(__u).', 'not p((__t+-1)) :- p((__t+1)).')]}))
+            {('initial', 1): ['not p((__t+-1)) :- p((__t+1)).']}))
         self.assertEqual(transform_program("not p' :- p'."), (
             ['#program initial(__t,__u).'], set(),
-            {('initial', 1): [('not p((__t+1)) :- p((__t+1)); __final(__u).', 'not p((__t+1)) :- p((__t+1)).')]}))
+            {('initial', 1): ['not p((__t+1)) :- p((__t+1)).']}))
+        self.assertEqual(transform_program("not not p' :- q."), (
+            ['#program initial(__t,__u).'], set(),
+            {('initial', 0): ['#false :- q(__t); __final(__u).'],
+             ('initial', 1): ['not not p((__t+1)) :- q(__t).']}))
+        self.assertEqual(transform_program(":- q, not p'."), (
+            ['#program initial(__t,__u).'], set(),
+            {('initial', 0): ['#false :- q(__t); __final(__u).'],
+             ('initial', 1): ['#false :- q(__t); not p((__t+1)).']}))
+        self.assertEqual(transform_program(":- p', not q''."), (
+            ['#program initial(__t,__u).'], set(),
+            {('initial', 1): ['#false :- p((__t+1)); __final(__u).'],
+             ('initial', 2): ['#false :- p((__t+1)); not q((__t+2)).']}))
         # body aggregates
         self.assertEqual(transform_program(":- {p':q'}."), (
             ['#program initial(__t,__u).'], set(),
-            {('initial', 1): [('#false :- { p((__t+1)) : q((__t+1)) }; __final(__u).', '#false :- { p((__t+1)) : q((__t+1)) }.')]}))
+            {('initial', 0): ['#false :- { p((__t+1)) : q((__t+1)) }; __final(__u).'],
+             ('initial', 1): ['#false :- { p((__t+1)) : q((__t+1)) }.']}))
         # initial, final, true, and false
         self.assertEqual(transform_program(":-&initial."), (['#program initial(__t,__u).', '#false :- __initial(__t).'], set(), {}))
         self.assertEqual(transform_program(":-&final."), (['#program initial(__t,__u).', '#false :- __final(__t).'], set(), {}))
@@ -172,6 +196,22 @@ def transform(p):
     f, c = _tfs.transform([p], append)
     return r, f, c
 
+def transform_parallel(ps):
+    r = []
+    def append(s):
+        if s.type != ast.ASTType.TheoryDefinition:
+            r.append(str(s).replace(". [false]", "."))
+    f, c = _tfs.transform(ps, append, 2)
+    return r, f, c
+
+def transform_cached(p, d):
+    r = []
+    def append(s):
+        if s.type != ast.ASTType.TheoryDefinition:
+            r.append(str(s).replace(". [false]", "."))
+    f, c = _tfs.transform_cached([p], append, d)
+    return r, f, c
+
 class TestTransform(unittest.TestCase):
     static = ['#program initial(__t,__u).',
               '__initial(__t).',
@@ -186,7 +226,14 @@ class TestTransform(unittest.TestCase):
         self.assertEqual(transform("p."), (['#program initial(__t,__u).', 'p(__t).'] + TestTransform.static, [], TestTransform.parts))
         self.assertEqual(transform("p'."), (
             ['#program initial(__t,__u).',
-             '__future_p(1,(__t+1)).',
+             '#program always(__t,__u).',
+             'p(__t) :- __t=1.',
+             '#program initial_0(__t,__u).',
+             '#false :- __final(__u).'] + TestTransform.static,
+            [], [('initial', 'initial_0', range(0, 1))] + TestTransform.parts))
+        self.assertEqual(transform("p' :- not &tel { a }."), (
+            ['#program initial(__t,__u).',
+             '__future_p(1,(__t+1)) :- not &tel(__t) { a :  }.',
              '#program always(__t,__u).',
              'p(__t) :- __future_p(1,__t).'] + TestTransform.static,
             [('__future_p', 2, True)], TestTransform.parts))
@@ -196,10 +243,49 @@ class TestTransform(unittest.TestCase):
             [], TestTransform.parts))
         self.assertEqual(transform(":- p''."), (
             ['#program initial(__t,__u).',
-             '#program initial_0_1(__t,__u).',
-             '#false :- p((__t+2)); __final(__u).',
              '#program initial_2(__t,__u).',
              '#false :- p((__t+2)).'] + TestTransform.static, [],
-            [('initial', 'initial_0_1', range(0, 2)),
-             ('initial', 'initial_2',   range(2, 3))] + TestTransform.parts))
+            [('initial', 'initial_2', range(2, 3))] + TestTransform.parts))
+        self.assertEqual(transform(":- q, not p'."), (
+            ['#program initial(__t,__u).',
+             '#program initial_0(__t,__u).',
+             '#false :- q(__t); __final(__u).',
+             '#program initial_1(__t,__u).',
+             '#false :- q(__t); not p((__t+1)).'] + TestTransform.static, [],
+            [('initial', 'initial_0', range(0, 1)),
+             ('initial', 'initial_1', range(1, 2))] + TestTransform.parts))
 
+    def test_transform_cached(self):
+        d = tempfile.mkdtemp()
+        try:
+            for p in ["p.", "p'.", "p(X)|q.", ":- p''."]:
+                self.assertEqual(transform_cached(p, d), transform(p))
+                self.assertEqual(transform_cached(p, d), transform(p))
+        finally:
+            shutil.rmtree(d)
+
+    def test_transform_parallel(self):
+        self.maxDiff = None
+        self.assertEqual(transform_parallel(["p.", "q :- p."]), (
+            ['#program initial(__t,__u).', 'p(__t).',
+             '#program initial(__t,__u).', 'q(__t) :- p(__t).'] + TestTransform.static,
+            [], TestTransform.parts))
+        self.assertEqual(transform_parallel([":- q, not p'.", "#program always. :- r, not s'."]), (
+            ['#program initial(__t,__u).',
+             '#program initial(__t,__u).',
+             '#program always(__t,__u).',
+             '#program always_0(__t,__u).',
+             '#false :- r(__t); __final(__u).',
+             '#program always_1(__t,__u).',
+             '#false :- r(__t); not s((__t+1)).',
+             '#program initial_0(__t,__u).',
+             '#false :- q(__t); __final(__u).',
+             '#program initial_1(__t,__u).',
+             '#false :- q(__t); not p((__t+1)).'] + TestTransform.static, [],
+            [('always', 'always_0', range(0, 1)),
+             ('always', 'always_1', range(1, 2)),
+             ('initial', 'initial_0', range(0, 1)),
+             ('initial', 'initial_1', range(1, 2))] + TestTransform.parts))
+        self.assertEqual(transform_parallel(["&tel { > a } :- b.", "&tel { > a } :- c."])[0][:4], [
+            '#program initial(__t,__u).', '__aux_0_0(__t) :- b(__t).',
+            '#program initial(__t,__u).', '__aux_1_0(__t) :- c(__t).'])
@@ -1,12 +1,36 @@
 """
 This module exports functions to translate (ground) theory atoms to rules via
 clingo's backend.
+
+Functions:
+enable_profiling -- Records translation costs and reports them at exit.
 """
 
+import sys as _sys
+import atexit as _atexit
 import clingo as _clingo
 from . import formula as _frm
 from . import body as _bd
 from . import head as _hd
+from . import propagator as _pr
+from . import profiler as _pf
+from .. import memory as _mem
+
+_g_profiler = None
+
+def enable_profiling(out=None):
+    """
+    Enables recording translation costs for theories created afterward.
+
+    The costs of all such theories are accumulated and a report ranked by
+    time is written to the given stream (standard error by default) when the
+    interpreter exits.
+    """
+    global _g_profiler
+    if _g_profiler is None:
+        _g_profiler = _pf.Profiler()
+        _atexit.register(lambda: _g_profiler.report(out if out is not None else _sys.stderr))
+    return _g_profiler
 
 class Theory:
     """
@@ -23,15 +47,28 @@ class Theory:
                        once).
     __todo          -- List of formulas to translate.
     __false_literal -- A literal that is false used during translation.
+    __propagator    -- Propagator receiving the clauses of body formulas
+                       (None if they are added as integrity constraints).
+    __profiler      -- Profiler recording translation costs (or None).
+    __memory        -- Monitor reporting memory after each step (or None).
+    __registered    -- Whether the propagator has been registered.
     """
-    def __init__(self):
+    def __init__(self, lazy=False):
         """
         Initializes an empty theory.
+
+        Arguments:
+        lazy -- Whether to add the clauses of body formulas lazily via a
+                propagator instead of eagerly via the backend.
         """
         self.__formulas = {}
         self.__todo_keys = set()
         self.__todo = []
         self.__false_literal = None
+        self.__propagator = _pr.NogoodPropagator() if lazy else None
+        self.__registered = False
+        self.__profiler = _g_profiler
+        self.__memory = _mem.monitor
 
     def add_formula(self, formula):
         """
@@ -53,6 +90,36 @@ class Theory:
             self.__todo_keys.add(key)
             self.__todo.append((step, formula))
 
+    def forget(self, step):
+        """
+        Drops the translation state of all formulas for steps in the range
+        [1, step).
+
+        Afterward, formulas must no longer be translated at these steps.
+
+        Arguments:
+        step -- First step whose state is kept.
+        """
+        for formula in self.__formulas.values():
+            if isinstance(formula, _bd.BodyFormula):
+                formula.forget(step)
+
+    def memory(self):
+        """
+        Returns a list of pairs of the data structures of the theory and the
+        number of bytes they hold (see telingo.memory.sizeof).
+        """
+        formulas = list(self.__formulas.values())
+        body = [x for x in formulas if isinstance(x, _bd.BodyFormula)]
+        head = [x for x in formulas if isinstance(x, _hd.HeadFormula)]
+        usage = [("formulas", _mem.sizeof(self.__formulas, *formulas) + _mem.sizeof(*[x._rep for x in body])),
+                 ("steps",    sum(x.memory() for x in body)),
+                 ("head",     sum(x.memory() for x in head)),
+                 ("todo",     _mem.sizeof(self.__todo, self.__todo_keys))]
+        if self.__propagator is not None:
+            usage.append(("nogoods", self.__propagator.memory()))
+        return usage
+
     def false_literal(self, backend):
         """
         Returns a false program literal.
@@ -75,20 +142,37 @@ class Theory:
         horizon -- The current horizon.
         prg     -- Control object (with theory atoms).
         """
+        terms = {}
         for atom in prg.theory_atoms:
             if atom.term.name == "tel" and len(atom.term.arguments) == 1:
                 step    = atom.term.arguments[0].number
-                formula = _bd.translate_elements(atom.elements, self.add_formula)
+                formula = _bd.translate_elements(atom.elements, self.add_formula, terms)
                 formula.add_atom(atom.literal, step)
                 self.add_todo(formula, step)
+                if self.__profiler is not None:
+                    self.__profiler.label(formula, atom)
             elif atom.term.name == "__tel_head" and len(atom.term.arguments) == 1:
                 step    = atom.term.arguments[0].number
-                formula = _hd.translate_formula(atom, self.add_formula)
+                formula = _hd.translate_formula(atom, self.add_formula, terms)
                 self.add_todo(formula, step)
+                if self.__profiler is not None:
+                    self.__profiler.label(formula, atom)
+
+        if self.__propagator is not None and not self.__registered:
+            prg.register_propagator(self.__propagator)
+            self.__registered = True
 
         if len(self.__todo) > 0:
             todo, self.__todo, self.__todo_keys = self.__todo, [], set()
+            add_nogood = self.__propagator.add_nogood if self.__propagator is not None else None
             with prg.backend() as b:
-                ctx = _frm.Context(b, prg.symbolic_atoms, self.add_todo, self.add_formula, self.false_literal, horizon)
+                if self.__profiler is not None:
+                    b = self.__profiler.backend(b)
+                    if add_nogood is not None:
+                        add_nogood = self.__profiler.add_nogood(add_nogood)
+                ctx = _frm.Context(b, prg.symbolic_atoms, self.add_todo, self.add_formula, self.false_literal, horizon, add_nogood, self.__profiler)
                 for step, formula in todo:
                     formula.translate(ctx, step)
+
+        if self.__memory is not None:
+            self.__memory.step(horizon, prg, self.memory)
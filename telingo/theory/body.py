@@ -4,6 +4,7 @@ rule bodies to rules via clingo's backend.
 """
 
 import clingo as _clingo
+from .. import memory as _mem
 
 from .formula import *
 
@@ -56,15 +57,18 @@ class BodyFormula(Formula):
     Base class of all temporal and Boolean formulas occurring in rule bodies.
 
     Members:
-    __rep  -- unique string representation of the formula
-    __data -- map from time points to StepData objects
+    __rep       -- unique string representation of the formula
+    __data      -- map from time points to StepData objects
+    __forgotten -- steps in the range [1, __forgotten) have been dropped
+                   from __data
     """
     def __init__(self, rep):
         """
         Initializes a formula with the given string representation.
         """
-        self.__rep  = rep
-        self.__data = {}
+        self.__rep       = rep
+        self.__data      = {}
+        self.__forgotten = 1
 
     @property
     def _rep(self):
@@ -87,14 +91,43 @@ class BodyFormula(Formula):
         ctx  -- Context object.
         step -- Step at which to translate.
         """
+        if ctx.profiler is not None:
+            ctx.profiler.enter(self)
         data = self.__data.setdefault(step, StepData())
         self.do_translate(ctx, step, data)
         if len(data.todo) > 0:
             for atom in data.todo:
-                make_equal(ctx.backend, atom, data.literal)
+                make_equal(ctx.add_nogood, atom, data.literal)
             del data.todo[:]
+        if ctx.profiler is not None:
+            ctx.profiler.leave()
         return data.literal
 
+    def forget(self, step):
+        """
+        Drops the StepData objects of steps in the range [1, step).
+
+        The data of the initial state is kept because it can be referred to
+        from arbitrary steps. Translating the formula at a dropped step
+        translates it again from scratch.
+
+        Arguments:
+        step -- First step whose data is kept.
+        """
+        for s in range(self.__forgotten, step):
+            self.__data.pop(s, None)
+        self.__forgotten = max(self.__forgotten, step)
+
+    def memory(self):
+        """
+        Returns the number of bytes held by the StepData objects of the
+        formula (see telingo.memory.sizeof).
+        """
+        size = _mem.sizeof(self.__data)
+        for data in self.__data.values():
+            size += _mem.sizeof(data, data.literals, data.todo)
+        return size
+
     def add_atom(self, atom, step):
         """
         Adds the given atom to the equivalent literals of the theory atom at
@@ -243,6 +276,13 @@ class Negation(BodyFormula):
         BodyFormula.__init__(self, "(~{})".format(arg._rep))
         self.__arg = arg
 
+    @property
+    def arg(self):
+        """
+        Return the negated formula.
+        """
+        return self.__arg
+
     def do_translate(self, ctx, step, data):
         """
         Translates the formula.
@@ -312,12 +352,12 @@ class BooleanFormula(BodyFormula):
                     rhs = -rhs
                 elif self.__operator == "->":
                     lhs = -lhs
-                make_disjunction(ctx.backend, lit, lhs, rhs)
+                make_disjunction(ctx.add_nogood, lit, lhs, rhs)
             elif self.__operator == "<>":
-                ctx.backend.add_rule([], [ lit,  rhs,  lhs])
-                ctx.backend.add_rule([], [ lit, -rhs, -lhs])
-                ctx.backend.add_rule([], [-lit,  rhs, -lhs])
-                ctx.backend.add_rule([], [-lit, -rhs,  lhs])
+                ctx.add_nogood([ lit,  rhs,  lhs])
+                ctx.add_nogood([ lit, -rhs, -lhs])
+                ctx.add_nogood([-lit,  rhs, -lhs])
+                ctx.add_nogood([-lit, -rhs,  lhs])
 
 # Temporal Formulas {{{1
 
@@ -345,6 +385,13 @@ class Previous(BodyFormula):
         self.__weak = weak
         self.__n = n
 
+    @property
+    def shift(self):
+        """
+        Return the triple (arg, n, weak) of the formula.
+        """
+        return self.__arg, self.__n, self.__weak
+
     def do_translate(self, ctx, step, data):
         """
         Translates an atom.
@@ -429,6 +476,13 @@ class Next(BodyFormula):
         self.__weak = weak
         self.__n    = n
 
+    @property
+    def shift(self):
+        """
+        Return the triple (arg, n, weak) of the formula.
+        """
+        return self.__arg, self.__n, self.__weak
+
     def do_translate(self, ctx, step, data):
         """
         Translates an atom.
@@ -463,7 +517,7 @@ class Next(BodyFormula):
             assert(step in range(0, ctx.horizon + 1))
             if step + self.__n <= ctx.horizon:
                 arg = self.__arg.translate(ctx, step + self.__n)
-                make_equal(ctx.backend, data.literal, arg)
+                make_equal(ctx.add_nogood, data.literal, arg)
                 ctx.backend.add_external(data.literal, _clingo.TruthValue.Free)
                 data.done = True
             else:
@@ -524,13 +578,13 @@ class TelFormula(BodyFormula):
             lit, rhs, pre = -lit, -rhs, -pre
             if lhs is not None:
                 lhs = -lhs
-        ctx.backend.add_rule([], [-lit, rhs])
-        ctx.backend.add_rule([], [-rhs, -pre, lit])
+        ctx.add_nogood([-lit, rhs])
+        ctx.add_nogood([-rhs, -pre, lit])
         if lhs is not None:
-            ctx.backend.add_rule([], [-lit,  lhs, pre])
-            ctx.backend.add_rule([], [-rhs, -lhs, lit])
+            ctx.add_nogood([-lit,  lhs, pre])
+            ctx.add_nogood([-rhs, -lhs, lit])
         else:
-            ctx.backend.add_rule([], [-lit, pre])
+            ctx.add_nogood([-lit, pre])
 
 
 class TelFormulaP(TelFormula):
@@ -625,9 +679,75 @@ class TelFormulaN(TelFormula):
             fut = self.__future.translate(ctx, step)
             self._translate(ctx, step, data, fut)
 
+# Normalisation of Formulas {{{1
+
+def create_negation(arg, add_formula):
+    """
+    Returns the negation of the given formula.
+
+    Because negation is translated by negating literals, a double negation
+    is dropped. A negation in front of a previous or next operator applied
+    to a negated formula is removed by switching the weakness of the
+    operator, e.g., ~(>: ~p) becomes > p.
+
+    Arguments:
+    arg         -- Formula to negate.
+    add_formula -- Callback to add resulting formulas.
+    """
+    if isinstance(arg, Negation):
+        return arg.arg
+    if isinstance(arg, (Previous, Next)):
+        inner, n, weak = arg.shift
+        if isinstance(inner, Negation):
+            create = create_previous if isinstance(arg, Previous) else create_next
+            return create(inner.arg, n, not weak, add_formula)
+    return add_formula(Negation(arg))
+
+def create_previous(arg, n, weak, add_formula):
+    """
+    Returns a formula referring to the n-th previous state.
+
+    Chains of previous operators of the same weakness are merged into one
+    operator, e.g., < < p becomes 2 < p.
+
+    Arguments:
+    arg         -- The argument of the previous operator.
+    n           -- How many steps to look back.
+    weak        -- Whether this is a weak previous operator.
+    add_formula -- Callback to add resulting formulas.
+    """
+    if n == 0:
+        return arg
+    if isinstance(arg, Previous):
+        inner, m, inner_weak = arg.shift
+        if inner_weak == weak:
+            return create_previous(inner, n + m, weak, add_formula)
+    return add_formula(Previous(arg, n, weak))
+
+def create_next(arg, n, weak, add_formula):
+    """
+    Returns a formula referring to the n-th next state.
+
+    Chains of next operators of the same weakness are merged into one
+    operator, e.g., > > p becomes 2 > p.
+
+    Arguments:
+    arg         -- The argument of the next operator.
+    n           -- How many steps to look ahead.
+    weak        -- Whether this is a weak next operator.
+    add_formula -- Callback to add resulting formulas.
+    """
+    if n == 0:
+        return arg
+    if isinstance(arg, Next):
+        inner, m, inner_weak = arg.shift
+        if inner_weak == weak:
+            return create_next(inner, n + m, weak, add_formula)
+    return add_formula(Next(arg, n, weak))
+
 # Theory of Formulas {{{1
 
-def create_atom(rep, add_formula, positive):
+def create_atom(rep, add_formula, positive, memo=None):
     """
     Returns the atom corresponding the given theory term.
 
@@ -637,17 +757,18 @@ def create_atom(rep, add_formula, positive):
     rep         -- Theory term to translate.
     add_formula -- Callback to add resulting formulas.
     positive    -- Boolean indicating the classical sign.
+    memo        -- Dictionary of converted terms (see memoize).
     """
     if rep.type == _clingo.TheoryTermType.Symbol:
         return add_formula(Atom(rep.name, [], positive))
     elif rep.type == _clingo.TheoryTermType.Function:
         if rep.name == "-" and len(rep.arguments) == 1:
-            return create_atom(rep.arguments[0], add_formula, not positive)
+            return create_atom(rep.arguments[0], add_formula, not positive, memo)
         elif rep.name not in g_binary_operators and rep.name not in g_unary_operators and rep.name not in g_tel_operators and rep.name not in g_arithmetic_operators:
-            return add_formula(Atom(rep.name, [create_symbol(arg) for arg in rep.arguments], positive))
+            return add_formula(Atom(rep.name, [create_symbol(arg, memo) for arg in rep.arguments], positive))
     raise RuntimeError("invalid atom: ".format(rep))
 
-def create_formula(rep, add_formula):
+def create_formula(rep, add_formula, memo=None):
     """
     Returns the temporal formula corresponding the given theory term.
 
@@ -656,29 +777,36 @@ def create_formula(rep, add_formula):
     Arguments:
     rep         -- Theory term to translate.
     add_formula -- Callback to add resulting formuals.
+    memo        -- Dictionary of converted terms (see memoize).
+    """
+    return memoize(memo, ("body", rep), lambda: _create_formula(rep, add_formula, memo))
+
+def _create_formula(rep, add_formula, memo):
+    """
+    Converts the given theory term into a formula (see create_formula).
     """
     if rep.type == _clingo.TheoryTermType.Symbol:
-        return create_atom(rep, add_formula, True)
+        return create_atom(rep, add_formula, True, memo)
     elif rep.type == _clingo.TheoryTermType.Function:
         args = rep.arguments
         if rep.name in g_binary_operators and len(args) == 2:
-            lhs = create_formula(args[0], add_formula)
-            rhs = create_formula(args[1], add_formula)
+            lhs = create_formula(args[0], add_formula, memo)
+            rhs = create_formula(args[1], add_formula, memo)
             return add_formula(BooleanFormula(rep.name, lhs, rhs))
         elif rep.name in g_unary_operators and len(args) == 1:
-            arg = create_formula(args[0], add_formula)
-            return add_formula(Negation(arg))
+            arg = create_formula(args[0], add_formula, memo)
+            return create_negation(arg, add_formula)
         elif rep.name in g_tel_operators:
-            rhs = create_formula(args[-1], add_formula)
+            rhs = create_formula(args[-1], add_formula, memo)
             if rep.name == "<" or rep.name == "<:":
                 lhs = 1 if len(args) == 1 else create_number(args[0])
-                return rhs if lhs == 0 else add_formula(Previous(rhs, lhs, rep.name == "<:"))
+                return create_previous(rhs, lhs, rep.name == "<:", add_formula)
             elif rep.name == ">" or rep.name == ">:":
                 lhs = 1 if len(args) == 1 else create_number(args[0])
-                return rhs if lhs == 0 else add_formula(Next(rhs, lhs, rep.name == ">:"))
-            lhs = None if len(args) == 1 else create_formula(args[0], add_formula)
+                return create_next(rhs, lhs, rep.name == ">:", add_formula)
+            lhs = None if len(args) == 1 else create_formula(args[0], add_formula, memo)
             if rep.name == "<;" or rep.name == "<:;":
-                return add_formula(BooleanFormula("&", Previous(lhs, 1, rep.name == "<:;"), rhs))
+                return add_formula(BooleanFormula("&", create_previous(lhs, 1, rep.name == "<:;", add_formula), rhs))
             elif rep.name == "<*":
                 return add_formula(TelFormulaP("<*", lhs, rhs))
             elif rep.name == "<?":
@@ -686,7 +814,7 @@ def create_formula(rep, add_formula):
             elif rep.name == "<<":
                 return add_formula(Initially(rhs))
             elif rep.name == ";>" or rep.name == ";>:":
-                return add_formula(BooleanFormula("&", lhs, Next(rhs, 1, rep.name == ";>:")))
+                return add_formula(BooleanFormula("&", lhs, create_next(rhs, 1, rep.name == ";>:", add_formula)))
             elif rep.name == ">*":
                 formula = add_formula(TelFormulaN(">*", lhs, rhs))
                 formula.set_future(add_formula(Next(formula, 1, True)))
@@ -697,7 +825,7 @@ def create_formula(rep, add_formula):
                 return formula
             else:
                 assert(rep.name == ">>")
-                rhs = add_formula(BooleanFormula("|", add_formula(Negation(add_formula(Atom("__final", [], True)))), rhs))
+                rhs = add_formula(BooleanFormula("|", create_negation(add_formula(Atom("__final", [], True)), add_formula), rhs))
                 formula = add_formula(TelFormulaN(">*", None, rhs))
                 formula.set_future(add_formula(Next(formula, 1, True)))
                 return formula
@@ -714,7 +842,7 @@ def create_formula(rep, add_formula):
             else:
                 raise RuntimeError("invalid temporal formula: ".format(rep))
         else:
-            return create_atom(rep, add_formula, True)
+            return create_atom(rep, add_formula, True, memo)
     else:
         raise RuntimeError("invalid temporal formula: ".format(rep))
 
@@ -737,7 +865,7 @@ def translate_conjunction(formulas, add_formula):
     return formula
 
 
-def translate_elements(elements, add_formula):
+def translate_elements(elements, add_formula, memo=None):
     """
     Translate the given conjunction of elements and return a formula.
 
@@ -748,11 +876,12 @@ def translate_elements(elements, add_formula):
     Arguments:
     elements    -- List of theory elements.
     add_formula -- Callback to add resulting formuals.
+    memo        -- Dictionary of converted terms (see memoize).
     """
     formulas = []
 
     for element in elements:
-        formulas.append(create_formula(element.terms[0], add_formula))
+        formulas.append(create_formula(element.terms[0], add_formula, memo))
         if len(element.condition) > 0:
             condition = translate_conjunction([add_formula(NumericLiteral(literal)) for literal in element.condition], add_formula)
             formulas[-1] = add_formula(BooleanFormula("->", condition, formulas[-1]))
@@ -6,31 +6,31 @@ formulas in rule heads and bodies.
 import abc as _abc
 import clingo as _clingo
 
-def make_equal(backend, a, b):
+def make_equal(add_nogood, a, b):
     """
     Generates clauses for a <-> b.
 
     Arguments:
-    backend -- Backend to add clauses to.
-    a       -- first literal
-    b       -- second literal
+    add_nogood -- Function to add nogoods.
+    a          -- first literal
+    b          -- second literal
     """
-    backend.add_rule([], [ a, -b])
-    backend.add_rule([], [-a,  b])
+    add_nogood([ a, -b])
+    add_nogood([-a,  b])
 
-def make_disjunction(backend, e, a, b):
+def make_disjunction(add_nogood, e, a, b):
     """
     Generates clauses for e <-> a | b.
 
     Arguments:
-    backend -- Backend to add clauses to.
-    e       -- equivalent literal
-    a       -- first literal of disjunction
-    b       -- second literal of disjunction
+    add_nogood -- Function to add nogoods.
+    e          -- equivalent literal
+    a          -- first literal of disjunction
+    b          -- second literal of disjunction
     """
-    backend.add_rule([], [ e, -a, -b])
-    backend.add_rule([], [-e, a])
-    backend.add_rule([], [-e, b])
+    add_nogood([ e, -a, -b])
+    add_nogood([-e, a])
+    add_nogood([-e, b])
 
 class Context:
     """
@@ -42,9 +42,12 @@ class Context:
     backend         -- Clingo Backend object.
     symbols         -- Clingo SymbolicAtoms object.
     horizon         -- Current search horizon.
+    add_nogood      -- Function to add a list of literals that must not be
+                       true together.
+    profiler        -- Profiler recording translation costs (or None).
     __false_literal -- Function to obtain a false literal.
     """
-    def __init__(self, backend, symbols, add_todo, add_formula, false_literal, horizon):
+    def __init__(self, backend, symbols, add_todo, add_formula, false_literal, horizon, add_nogood=None, profiler=None):
         """
         Initializes the context.
 
@@ -53,9 +56,15 @@ class Context:
         symbols       -- SymbolicAtoms object.
         add_todo      -- Function to add theory atoms to the todo list.
         false_literal -- Function to obtain a false literal.
+        horizon       -- Current search horizon.
+        add_nogood    -- Function to add nogoods (integrity constraints are
+                         added via the backend if None).
+        profiler      -- Profiler recording translation costs (or None).
         """
         self.add_todo        = add_todo
         self.add_formula     = add_formula
+        self.add_nogood      = add_nogood if add_nogood is not None else lambda literals: backend.add_rule([], literals)
+        self.profiler        = profiler
         self.backend         = backend
         self.symbols         = symbols
         self.horizon         = horizon
@@ -110,6 +119,17 @@ class Formula:
         """
         pass
 
+    def forget(self, step):
+        """
+        Drops step specific translation state of steps before the given step.
+
+        Formulas without such state do not have to implement this function.
+
+        Arguments:
+        step -- First step whose state is kept.
+        """
+        pass
+
 def create_number(rep):
     if rep.type == _clingo.TheoryTermType.Function:
         args = rep.arguments
@@ -128,14 +148,44 @@ def create_number(rep):
     #       the corresponding formula should evaluate to false
     raise RuntimeError("number expected: ".format(rep))
 
-def create_symbol(rep):
+def memoize(memo, key, create):
+    """
+    Returns the value stored for the given key in memo calling create to
+    obtain and store it if there is none yet.
+
+    Theory terms are keyed by the terms themselves. Within one step, clingo
+    represents structurally equal terms by the same term, so that they are
+    converted only once; term identifiers may be reused in later steps, so a
+    memo must not outlive the step.
+
+    Arguments:
+    memo   -- Dictionary holding converted terms or None to disable
+              memoization.
+    key    -- Key identifying the conversion.
+    create -- Function performing the conversion.
+    """
+    if memo is None:
+        return create()
+    value = memo.get(key)
+    if value is None:
+        value = memo[key] = create()
+    return value
+
+def create_symbol(rep, memo=None):
     """
     Returns the symbolic representation of the given theory term.
 
     Throws an error if rep it is not a valid symbol.
 
     Arguments:
-    rep -- Theory term to translate.
+    rep  -- Theory term to translate.
+    memo -- Dictionary of converted terms (see memoize).
+    """
+    return memoize(memo, ("symbol", rep), lambda: _create_symbol(rep, memo))
+
+def _create_symbol(rep, memo):
+    """
+    Converts the given theory term into a symbol (see create_symbol).
     """
     if rep.type == _clingo.TheoryTermType.Number:
         return _clingo.Number(rep.number)
@@ -143,7 +193,7 @@ def create_symbol(rep):
         raise RuntimeError("invalid symbol: {}".format(rep))
     elif rep.type == _clingo.TheoryTermType.Function and rep.name in g_arithmetic_operators:
         if len(rep.arguments) == 1:
-            rhs = create_symbol(rep.arguments[0])
+            rhs = create_symbol(rep.arguments[0], memo)
             if rep.name == "-":
                 if rhs.type == _clingo.SymbolType.Number:
                     return _clingo.Number(-rhs.number)
@@ -165,5 +215,5 @@ def create_symbol(rep):
                 return _clingo.Supremum
             elif len(name) > 1 and name.startswith('"') and name.endswith('"'):
                 return _clingo.String(name[1:-1])
-        return _clingo.Function(name, [create_symbol(arg) for arg in args])
+        return _clingo.Function(name, [create_symbol(arg, memo) for arg in args])
 
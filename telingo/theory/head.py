@@ -7,6 +7,7 @@ import clingo as _clingo
 from telingo.transformers import transformer as _tf
 from collections import namedtuple as _namedtuple
 from . import body as _bd
+from .. import memory as _mem
 from .formula import *
 import itertools as _it
 import functools as _ft
@@ -69,7 +70,7 @@ TelNegation = new_tuple("TelNegation", ["rhs"], ["rhs"], formula_to_str)
 TelConstant = new_tuple("TelConstant", ["value"], [], formula_to_str)
 TelShift = new_tuple("TelShift", ["lhs", "rhs"], [], formula_to_str)
 
-def create_atom(rep, add_formula, positive):
+def create_atom(rep, add_formula, positive, memo=None):
     """
     Returns the atom corresponding the given theory term.
 
@@ -79,17 +80,18 @@ def create_atom(rep, add_formula, positive):
     rep         -- Theory term to translate.
     add_formula -- Callback to add resulting formulas.
     positive    -- Boolean indicating the classical sign.
+    memo        -- Dictionary of converted terms (see memoize).
     """
     if rep.type == _clingo.TheoryTermType.Symbol:
         return add_formula(TelAtom(positive, rep.name, []))
     elif rep.type == _clingo.TheoryTermType.Function:
         if rep.name == "-" and len(rep.arguments) == 1:
-            return create_atom(rep.arguments[0], add_formula, not positive)
+            return create_atom(rep.arguments[0], add_formula, not positive, memo)
         elif rep.name not in g_binary_operators and rep.name not in g_unary_operators and rep.name not in g_tel_operators and rep.name not in g_arithmetic_operators:
-            return add_formula(TelAtom(positive, rep.name, [create_symbol(arg) for arg in rep.arguments]))
+            return add_formula(TelAtom(positive, rep.name, [create_symbol(arg, memo) for arg in rep.arguments]))
     raise RuntimeError("invalid atom: ".format(rep))
 
-def create_formula(rep, add_formula):
+def create_formula(rep, add_formula, memo=None):
     """
     Returns the temporal formula corresponding the given theory term.
 
@@ -98,29 +100,41 @@ def create_formula(rep, add_formula):
     Arguments:
     rep         -- Theory term to translate.
     add_formula -- Callback to add resulting formuals.
+    memo        -- Dictionary of converted terms (see memoize).
+    """
+    return memoize(memo, ("head", rep), lambda: _create_formula(rep, add_formula, memo))
+
+def _create_formula(rep, add_formula, memo):
+    """
+    Converts the given theory term into a formula (see create_formula).
     """
     if rep.type == _clingo.TheoryTermType.Symbol:
-        return create_atom(rep, add_formula, True)
+        return create_atom(rep, add_formula, True, memo)
     elif rep.type == _clingo.TheoryTermType.Function:
         args = rep.arguments
         if rep.name in g_binary_operators and len(args) == 2:
             if rep.name in ("|", "&"):
-                lhs = create_formula(args[0], add_formula)
-                rhs = create_formula(args[1], add_formula)
+                lhs = create_formula(args[0], add_formula, memo)
+                rhs = create_formula(args[1], add_formula, memo)
                 return add_formula(TelClause([lhs, rhs], rep.name == "&"))
             else:
                 raise RuntimeError("invalid temporal formula: {}".format(rep))
         elif rep.name in g_unary_operators and len(args) == 1:
-            arg = create_formula(args[0], add_formula)
+            arg = create_formula(args[0], add_formula, memo)
             return add_formula(TelNegation(arg))
         elif rep.name in g_tel_operators:
             if rep.name in ("<", "<:", "<;", "<:;", "<*", "<?", "<<"):
                 raise RuntimeError("invalid temporal formula: {}".format(rep))
-            rhs = create_formula(args[-1], add_formula)
+            rhs = create_formula(args[-1], add_formula, memo)
             if rep.name == ">" or rep.name == ">:":
                 lhs = 1 if len(args) == 1 else create_number(args[0])
-                return rhs if lhs == 0 else add_formula(TelNext(lhs, rhs, rep.name == ">:"))
-            lhs = None if len(args) == 1 else create_formula(args[0], add_formula)
+                if lhs == 0:
+                    return rhs
+                # merge chains of next operators of the same weakness
+                if isinstance(rhs, TelNext) and rhs.weak == (rep.name == ">:"):
+                    lhs, rhs = lhs + rhs.lhs, rhs.rhs
+                return add_formula(TelNext(lhs, rhs, rep.name == ">:"))
+            lhs = None if len(args) == 1 else create_formula(args[0], add_formula, memo)
             if rep.name in (";>", ";>:"):
                 return add_formula(TelClause([lhs, TelNext(1, rhs, rep.name == ";>:")], True))
             elif rep.name in (">*", ">?"):
@@ -143,7 +157,7 @@ def create_formula(rep, add_formula):
             else:
                 raise RuntimeError("invalid temporal formula: ".format(rep))
         else:
-            return create_atom(rep, add_formula, True)
+            return create_atom(rep, add_formula, True, memo)
     else:
         raise RuntimeError("invalid temporal formula: ".format(rep))
 
@@ -207,7 +221,7 @@ class HeadFormulaToBodyFormula(_tf.Transformer):
         return self.__add_formula(_bd.Atom(x.name, x.arguments, x.positive))
 
     def visit_TelNext(self, x):
-        return self.__add_formula(_bd.Next(self(x.rhs), x.lhs, x.weak))
+        return _bd.create_next(self(x.rhs), x.lhs, x.weak, self.__add_formula)
 
     def visit_TelUntil(self, x):
         formula = self.__add_formula(_bd.TelFormulaN(">?", None if x.lhs is None else self(x.lhs), self(x.rhs)))
@@ -220,7 +234,7 @@ class HeadFormulaToBodyFormula(_tf.Transformer):
         return _ft.reduce(lambda l, r: _bd.BooleanFormula(op, l, r), elements)
 
     def visit_TelNegation(self, x):
-        return self.__add_formula(_bd.Negation(self(x.rhs)))
+        return _bd.create_negation(self(x.rhs), self.__add_formula)
 
     def visit_TelConstant(self, x):
         return self.__add_formula(_bd.BooleanConstant(x.value))
@@ -240,13 +254,9 @@ class ClauseToRule(_tf.Transformer):
             self.__head.append(atom.literal)
 
     def visit_TelShift(self, x, ctx, step):
-        stp = lambda x, n, w: x
-        if x.lhs != 0:
-            stp = _bd.Next if x.lhs > 0 else _bd.Previous
-        neg = lambda x: ctx.add_formula(_bd.Negation(x))
-        nxt = lambda l, r: ctx.add_formula(stp(r, abs(l), False))
+        stp = _bd.create_next if x.lhs > 0 else _bd.create_previous
         rhs = head_formula_to_body_formula(x.rhs, ctx.add_formula)
-        frm = neg(nxt(x.lhs, rhs))
+        frm = _bd.create_negation(stp(rhs, abs(x.lhs), False, ctx.add_formula), ctx.add_formula)
         self.__body.append(frm.translate(ctx, step))
 
 def translate_clause(clause, ctx, step, body_literal):
@@ -294,6 +304,8 @@ class HeadFormula(Formula):
           way so that become more compact. The current proof-of-concept
           translation does not pay much mind to this.
         """
+        if ctx.profiler is not None:
+            ctx.profiler.enter(self)
         shifted = shift_formula(self.__formula, step - self.__timestep)
         undfolded = unfold_formula(shifted)
 
@@ -307,17 +319,26 @@ class HeadFormula(Formula):
             translate_clause(clause, ctx, step, self.__literals[0])
 
         ctx.add_todo(self, step+1)
+        if ctx.profiler is not None:
+            ctx.profiler.leave()
 
     def add_literal(self, literal):
         self.__literals.append(literal)
 
+    def memory(self):
+        """
+        Returns the number of bytes held by the literals of the formula (see
+        telingo.memory.sizeof).
+        """
+        return _mem.sizeof(self.__literals)
+
     def __str__(self):
         return "{}@{}".format(self.__formula, self.__timestep)
 
     def __repr__(self):
         return "HeadFormula({!r},{!r})".format(self.__timestep, self.__formula)
 
-def translate_formula(atom, add_formula):
+def translate_formula(atom, add_formula, memo=None):
     '''
     - add the formula to the above variants
     - print the variants
@@ -326,7 +347,7 @@ def translate_formula(atom, add_formula):
     for x in atom.elements:
         if x.condition or len(x.terms) != 1:
             raise RuntimeError('invalid temporal formula: {}'.format(atom))
-        clause.append(create_formula(x.terms[0], add_formula))
+        clause.append(create_formula(x.terms[0], add_formula, memo))
     formula = HeadFormula(atom.term.arguments[0].number, clause[0] if len(clause) == 1 else TelClause(clause, False))
     formula.add_literal(atom.literal)
     return formula
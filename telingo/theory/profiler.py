@@ -0,0 +1,157 @@
+"""
+This module exports a profiler recording the cost of translating temporal
+formulas.
+
+For each formula class and for each theory atom a formula stems from, the
+profiler counts the calls to translate, the atoms, rules, and externals added
+to the backend, and the time spent. Rules include the clauses handed to the
+propagator of the lazy engine. The time of a formula class excludes the time
+spent translating its subformulas while the time of a theory atom includes
+it.
+"""
+
+import timeit as _timeit
+
+class _Counters:
+    """
+    Costs accumulated for one formula class or theory atom.
+    """
+    def __init__(self):
+        self.calls     = 0
+        self.atoms     = 0
+        self.rules     = 0
+        self.externals = 0
+        self.time      = 0.0
+
+class _Backend:
+    """
+    Backend proxy counting the atoms, rules, and externals added.
+    """
+    def __init__(self, profiler, backend):
+        self.__profiler = profiler
+        self.__backend  = backend
+
+    def add_atom(self, *args):
+        self.__profiler.count("atoms")
+        return self.__backend.add_atom(*args)
+
+    def add_rule(self, *args, **kwargs):
+        self.__profiler.count("rules")
+        return self.__backend.add_rule(*args, **kwargs)
+
+    def add_external(self, *args):
+        self.__profiler.count("externals")
+        return self.__backend.add_external(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.__backend, name)
+
+class Profiler:
+    """
+    Records the costs of translating formulas.
+
+    Members:
+    __classes -- Map from formula class names to costs.
+    __sources -- Map from theory atom labels to costs.
+    __labels  -- Map from formula keys to the labels of the theory atoms they
+                 stem from.
+    __stack   -- Stack of tuples (class costs, source costs, label, start
+                 time) of the formulas being translated.
+    __child   -- Stack of times spent in subformulas of the formulas being
+                 translated.
+    """
+    def __init__(self):
+        """
+        Initializes the profiler without any costs recorded.
+        """
+        self.__classes = {}
+        self.__sources = {}
+        self.__labels  = {}
+        self.__stack   = []
+        self.__child   = []
+
+    def label(self, formula, atom):
+        """
+        Records that the given formula stems from the given theory atom.
+
+        The step argument of the theory atom is not part of the label, so
+        that the costs of an atom are accumulated over all steps.
+        """
+        elements = "; ".join(str(element) for element in atom.elements)
+        self.__labels.setdefault(formula._rep, "&{}{{ {} }}".format(atom.term.name, elements))
+
+    def backend(self, backend):
+        """
+        Returns a proxy of the given backend counting the added statements.
+        """
+        return _Backend(self, backend)
+
+    def add_nogood(self, add_nogood):
+        """
+        Returns a wrapper of the given function counting the added nogoods
+        as rules.
+        """
+        def wrapper(literals):
+            self.count("rules")
+            return add_nogood(literals)
+        return wrapper
+
+    def count(self, counter):
+        """
+        Increments the given counter of the formula being translated.
+        """
+        if self.__stack:
+            cls, src, _, _ = self.__stack[-1]
+            setattr(cls, counter, getattr(cls, counter) + 1)
+            setattr(src, counter, getattr(src, counter) + 1)
+
+    def enter(self, formula):
+        """
+        Starts the translation of the given formula.
+
+        The costs of subformulas are attributed to the theory atom of the
+        formula translated at the top of the stack. Subformulas without a
+        label inherit this label for later translations started from the
+        top, which happens for next operators at the horizon.
+        """
+        key = formula._rep
+        if self.__stack:
+            _, src, label, _ = self.__stack[-1]
+            self.__labels.setdefault(key, label)
+        else:
+            label = self.__labels.get(key, "<{}>".format(formula.__class__.__name__))
+            src = self.__sources.setdefault(label, _Counters())
+            src.calls += 1
+        cls = self.__classes.setdefault(formula.__class__.__name__, _Counters())
+        cls.calls += 1
+        self.__stack.append((cls, src, label, _timeit.default_timer()))
+        self.__child.append(0.0)
+
+    def leave(self):
+        """
+        Finishes the translation of the formula entered last.
+        """
+        cls, src, _, start = self.__stack.pop()
+        elapsed = _timeit.default_timer() - start
+        cls.time += elapsed - self.__child.pop()
+        if self.__child:
+            self.__child[-1] += elapsed
+        else:
+            src.time += elapsed
+
+    def report(self, out, limit=20):
+        """
+        Writes the recorded costs ranked by time to the given stream.
+
+        Arguments:
+        out   -- Stream to write to.
+        limit -- Maximum number of theory atoms listed.
+        """
+        row = "{:>10} {:>10} {:>10} {:>10} {:>10}  {}\n"
+        for title, costs, rows in [("Formula Class", self.__classes, None), ("Theory Atom", self.__sources, limit)]:
+            ranked = sorted(costs.items(), key=lambda x: (-x[1].time, x[0]))
+            out.write("Telingo Translation Profile ({})\n".format(title))
+            out.write(row.format("time", "calls", "atoms", "rules", "externals", title))
+            for name, c in ranked[:rows]:
+                out.write(row.format("{:.3f}".format(c.time), c.calls, c.atoms, c.rules, c.externals, name))
+            out.write("\n")
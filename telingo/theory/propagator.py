@@ -0,0 +1,143 @@
+"""
+This module exports a propagator adding the clauses of temporal body formulas
+lazily.
+
+Instead of adding the clauses obtained from translating body formulas as
+integrity constraints via clingo's backend, they are stored as nogoods in the
+propagator. A nogood is only handed to the solver once all but at most one of
+its literals are true, i.e., when it propagates or is conflicting. Nogoods
+that never become relevant during search are never added to the solver.
+"""
+
+from .. import memory as _mem
+
+class NogoodPropagator:
+    """
+    Propagator adding stored nogoods when they become unit or conflicting.
+
+    The nogoods are added as locked constraints, so that the solver does not
+    delete them during search. Because constraints added during search are
+    not guaranteed to survive between solve calls, the record of added
+    nogoods is reset in each call to init.
+
+    Members:
+    __nogoods  -- List of nogoods over program literals.
+    __mapped   -- Number of nogoods mapped to solver literals.
+    __solver   -- List of nogoods over solver literals (None if the nogood
+                  can never be violated).
+    __watches  -- Map from solver literals to indices of nogoods containing
+                  them.
+    __added    -- Per solver thread, set of indices of nogoods added during
+                  the current solve call.
+    __fixed    -- Per solver thread, whether nogoods over literals fixed
+                  before the current solve call still have to be checked.
+    """
+    def __init__(self):
+        """
+        Initializes the propagator without nogoods.
+        """
+        self.__nogoods = []
+        self.__mapped  = 0
+        self.__solver  = []
+        self.__watches = {}
+        self.__added   = []
+        self.__fixed   = []
+
+    def add_nogood(self, literals):
+        """
+        Stores a nogood over program literals.
+
+        Arguments:
+        literals -- Program literals that must not be true together.
+        """
+        self.__nogoods.append(list(literals))
+
+    def init(self, init):
+        """
+        Maps the nogoods stored since the last call to solver literals and
+        watches their literals.
+
+        Solver literal 1 is the true literal. Nogoods containing its negation
+        are dropped and the literal itself is removed from nogoods.
+        """
+        for nogood in self.__nogoods[self.__mapped:]:
+            lits = set()
+            for lit in nogood:
+                lits.add(init.solver_literal(lit))
+            if -1 in lits:
+                self.__solver.append(None)
+                continue
+            lits.discard(1)
+            index = len(self.__solver)
+            self.__solver.append(sorted(lits))
+            for lit in lits:
+                if lit not in self.__watches:
+                    self.__watches[lit] = []
+                    init.add_watch(lit)
+                self.__watches[lit].append(index)
+        self.__mapped = len(self.__nogoods)
+        self.__added = [set() for _ in range(init.number_of_threads)]
+        self.__fixed = [True] * init.number_of_threads
+
+    def __add(self, control, indices):
+        """
+        Adds the nogoods with the given indices that are unit or conflicting
+        under the current assignment.
+
+        Returns False if propagation has to stop.
+        """
+        assignment = control.assignment
+        added = self.__added[control.thread_id]
+        for index in indices:
+            if index in added:
+                continue
+            nogood = self.__solver[index]
+            if nogood is None:
+                continue
+            open_ = 0
+            for lit in nogood:
+                if assignment.is_false(lit):
+                    break
+                if not assignment.is_true(lit):
+                    open_ += 1
+                    if open_ > 1:
+                        break
+            else:
+                added.add(index)
+                if not control.add_nogood(nogood, lock=True) or not control.propagate():
+                    return False
+        return True
+
+    def memory(self):
+        """
+        Returns the number of bytes held by the stored nogoods and their
+        watches (see telingo.memory.sizeof).
+        """
+        lists = self.__nogoods + [x for x in self.__solver if x is not None] + list(self.__watches.values())
+        return _mem.sizeof(self.__nogoods, self.__solver, self.__watches, *(lists + self.__added))
+
+    def propagate(self, control, changes):
+        """
+        Adds the nogoods watching the changed literals if necessary.
+        """
+        for lit in changes:
+            if not self.__add(control, self.__watches.get(lit, [])):
+                return
+
+    def check(self, control):
+        """
+        Makes sure that a total assignment violates no nogood.
+
+        Nogoods are checked in propagate when their watched literals change.
+        Literals fixed before the solve call do not change during it, so the
+        nogoods containing such literals are checked once per solve call on
+        the first total assignment.
+        """
+        if not self.__fixed[control.thread_id]:
+            return
+        self.__fixed[control.thread_id] = False
+        assignment, indices = control.assignment, set()
+        for lit, watching in self.__watches.items():
+            if assignment.is_fixed(lit) and assignment.is_true(lit):
+                indices.update(watching)
+        self.__add(control, sorted(indices))
@@ -26,12 +26,25 @@ Handling of future atoms in the head
 ====================================
 The temporal program
 
-  p'.
+  #program always.
+  p' :- q.
 
-referring to the future in a normal rule head is rewritten into the following
-ASP program:
+referring to the future in a normal rule head is shifted into the past:
 
-  f_p(1,t+1).
+  #program always(t).
+  p(t) :- q(t-1); t>=1.
+  #program always_0(t,u).
+  :- q(t); __final(u).
+
+where the constraint requiring a next state is handled like the constraints
+referring to the future below. Rules in final program parts and rules with
+temporal formulas in their body cannot be shifted. Such a rule, like
+
+  p' :- not &tel { a }.
+
+is rewritten into the following ASP program:
+
+  f_p(1,t+1) :- not &tel(t) { a }.
 
 with auxiliary rules
 
@@ -50,30 +63,138 @@ The temporal program
 is rewritten into
 
   #program always(t).
-  #program always_0_1(t,u).
-  :- p((t+2)); __final(u).
   #program always_2(t,u).
   :- p((t+2)).
 
-where the constraint is removed from the always part and put into two
-additional program parts which have to be grounded for time points t, t-1, and
-t-2 as given by the last return value:
+where the constraint is removed from the always part and put into an
+additional program part which has to be grounded for time point t-2 as given by
+the last return value:
+
+  [('always', 'always_2', range(2, 3))]
+
+For time points t and t-1, the constraint is trivially satisfied because p(t+2)
+is false beyond the horizon. Negative literals referring beyond the horizon
+are dropped instead. The program
+
+  :- q, not p'.
+
+is rewritten into
 
-  [('always', 'always_0_1', range(0, 2)),
-   ('always', 'always_2',   range(2, 3))]
+  #program always(t).
+  #program always_0(t,u).
+  :- q(t); __final(u).
+  #program always_1(t,u).
+  :- q(t); not p((t+1)).
+
+where the first part has to be grounded for time point t but only holds while
+t is the final time point:
+
+  [('always', 'always_0', range(0, 1)),
+   ('always', 'always_1', range(1, 2))]
+
+Hence, a time point of a constraint looking k steps ahead is grounded up to k+1
+times, once for each horizon at which the constraint still refers beyond it.
+Grounding it just once is not possible: atoms beyond the horizon do not exist
+yet, so the grounder simplifies them away, and ground rules can neither be
+extended nor retracted once the atoms are defined in later steps. Declaring
+the future atoms as externals instead would require knowing their ground
+instances beforehand, which positive future literals binding variables (like
+in :- p(X)'.) rule out.
 
 Functions:
-transform -- transforms telingo programs into incremental ASP
+transform          -- transforms telingo programs into incremental ASP
+transform_instance -- transforms additional inputs for an already transformed
+                      program
+transform_cached   -- like transform but reusing results stored in a cache
+                      directory
 """
 
 from . import transformer as _tf
 from . import program as _prg
 
+import os as _os
+import json as _json
+import multiprocessing as _mp
+import hashlib as _hashlib
+import tempfile as _tempfile
 import clingo as _clingo
 from clingo import ast as _ast
 from textwrap import dedent as _dedent
 
-def transform(inputs, callback):
+"""
+Operators of the tel theory. Theory functions named after operators do not
+print in a form that parses back into the same term (a binary function
+prints as a unary operator applied to a tuple). Hence, they are renamed to
+plain function names while transformed statements are serialized and
+renamed back after parsing.
+"""
+_g_operators = ["&", "-", "+", "~", "<", "<:", "<?", "<*", "<<", ">", ">:", ">?", ">*", ">>",
+                "|", "<-", "->", "<>", ";>", ";>:", "<;", "<:;"]
+_g_operator_names = dict((op, "__tel_op_{}".format(i)) for i, op in enumerate(_g_operators))
+
+class _OperatorRenamer(_tf.Transformer):
+    """
+    Renames theory functions according to the given mapping.
+    """
+    def __init__(self, names):
+        self.__names = names
+
+    def visit_TheoryFunction(self, x):
+        self.visit_children(x)
+        if x.name in self.__names:
+            x.name = self.__names[x.name]
+        return x
+
+_g_encode = _OperatorRenamer(_g_operator_names)
+_g_decode = _OperatorRenamer(dict((name, op) for op, name in _g_operator_names.items()))
+
+def _serialize(statement):
+    """
+    Returns a string representation of a transformed statement that
+    _parse_statements parses back into the same statement.
+    """
+    _g_encode(statement)
+    try:
+        return str(statement)
+    finally:
+        _g_decode(statement)
+
+def _parse_statements(program, callback):
+    """
+    Parses a program obtained by serializing transformed statements passing
+    all statements except the leading base program directive to the callback.
+    """
+    def append(s):
+        if s.type != _ast.ASTType.Program or s.name != "base":
+            callback(_g_decode(s))
+    _clingo.parse_program(program, append)
+
+def _transform_input(task):
+    """
+    Transforms one input in a worker process.
+
+    Returns the transformed statements, constraint parts, and auxiliary rules
+    in string form together with the future predicates.
+
+    Arguments:
+    task -- Pair of the index and the text of the input.
+    """
+    index, text       = task
+    future_predicates = set()
+    constraint_parts  = {}
+    aux_rules         = []
+    statements        = []
+    transformer       = _prg.ProgramTransformer(future_predicates, constraint_parts, aux_rules, "__aux_{}_".format(index))
+    def append(s):
+        if s is not None:
+            statements.append(_serialize(s))
+    _clingo.parse_program(text, lambda s: append(transformer.visit(s)))
+    return ("\n".join(statements),
+            future_predicates,
+            dict((key, "\n".join(_serialize(r) for r in rules)) for key, rules in constraint_parts.items()),
+            "\n".join(_serialize(r) for r in aux_rules))
+
+def transform(inputs, callback, jobs=1):
     """
     Transforms the given list of temporal programs in string form into an ASP
     program.
@@ -82,9 +203,15 @@ def transform(inputs, callback):
     referring to the future, and program parts that have to be regrounded if
     there are constraints referring to the future.
 
+    If more than one job is requested, the inputs are transformed by a pool of
+    worker processes and the results merged in the order of the inputs. The
+    auxiliary predicates of temporal formulas in rule heads are then numbered
+    per input.
+
     Arguments:
     inputs   -- The list of inputs.
     callback -- Callback for rewritten statements.
+    jobs     -- Number of processes to transform inputs in parallel.
     """
     loc               = {'begin': {'line': 1, 'column': 1, 'filename': '<transform>'},
                          'end':   {'line': 1, 'column': 1, 'filename': '<transform>'}}
@@ -98,9 +225,22 @@ def transform(inputs, callback):
         if s is not None:
             callback(s)
     aux_rules = []
-    transformer = _prg.ProgramTransformer(future_predicates, constraint_parts, aux_rules)
-    for i in inputs:
-        _clingo.parse_program(i, lambda s: append(transformer.visit(s)))
+    if jobs > 1 and len(inputs) > 1:
+        pool = _mp.Pool(min(jobs, len(inputs)))
+        try:
+            results = pool.map(_transform_input, list(enumerate(inputs)))
+        finally:
+            pool.terminate()
+        for statements, predicates, parts, rules in results:
+            _parse_statements(statements, callback)
+            future_predicates.update(predicates)
+            for key, part in sorted(parts.items()):
+                _parse_statements(part, constraint_parts.setdefault(key, []).append)
+            _parse_statements(rules, aux_rules.append)
+    else:
+        transformer = _prg.ProgramTransformer(future_predicates, constraint_parts, aux_rules)
+        for i in inputs:
+            _clingo.parse_program(i, lambda s: append(transformer.visit(s)))
     if aux_rules:
         callback(_ast.Program(loc, "always", [_ast.Id(loc, _tf.g_time_parameter_name), _ast.Id(loc, _tf.g_time_parameter_name_alt)]))
         for rule in aux_rules:
@@ -123,21 +263,14 @@ def transform(inputs, callback):
     # gather rules for constraints referring to the future
     reground_parts = []
     if len(constraint_parts) > 0:
-        for (name, shift), rules in constraint_parts.items():
-            assert(shift > 0)
+        for (name, offset), rules in sorted(constraint_parts.items()):
             params = [_ast.Id(loc, _tf.g_time_parameter_name), _ast.Id(loc, _tf.g_time_parameter_name_alt)]
-            # parts to be regrounded
-            part = "{}_0_{}".format(name, shift-1)
+            # parts grounded offset steps before the horizon
+            part = "{}_{}".format(name, offset)
             callback(_ast.Program(loc, part, params))
-            for p, l in rules:
-                callback(p)
-            reground_parts.append((name, part, range(shift)))
-            # parts that no longer have to be regrounded
-            last_part = "{}_{}".format(name, shift)
-            callback(_ast.Program(loc, last_part, params))
-            for p, l in rules:
-                callback(l)
-            reground_parts.append((name, last_part, range(shift, shift+1)))
+            for r in rules:
+                callback(r)
+            reground_parts.append((name, part, range(offset, offset+1)))
 
     def add_part(part_name, atom_name, statement, wrap=lambda x: x):
         params = [_ast.Id(loc, _tf.g_time_parameter_name), _ast.Id(loc, _tf.g_time_parameter_name_alt)]
@@ -216,3 +349,99 @@ def transform(inputs, callback):
         }.
         '''), no_program)
     return future_sigs, reground_parts
+
+def transform_instance(inputs, callback):
+    """
+    Transforms the given list of temporal programs in string form into an ASP
+    program that can be added to a program obtained with transform.
+
+    Unlike transform, this function neither adds the definition of the tel
+    theory nor the auxiliary program parts. Hence, the inputs must not refer
+    to the future or contain temporal formulas in rule heads; typically, they
+    consist of the facts of an instance.
+
+    Arguments:
+    inputs   -- The list of inputs.
+    callback -- Callback for rewritten statements.
+    """
+    future_predicates = set()
+    constraint_parts  = {}
+    aux_rules         = []
+
+    def append(s):
+        if s is not None:
+            callback(s)
+    transformer = _prg.ProgramTransformer(future_predicates, constraint_parts, aux_rules)
+    for i in inputs:
+        _clingo.parse_program(i, lambda s: append(transformer.visit(s)))
+    if future_predicates or constraint_parts or aux_rules:
+        raise RuntimeError("instances must not refer to the future")
+
+def _cache_key(inputs):
+    """
+    Returns a key identifying the result of transforming the given inputs.
+
+    Besides the inputs, the key covers the clingo version and the sources of
+    the transformers so that changes to telingo invalidate cached results.
+    """
+    h = _hashlib.sha256()
+    h.update(_clingo.__version__.encode("utf-8"))
+    directory = _os.path.dirname(_os.path.abspath(__file__))
+    for name in sorted(_os.listdir(directory)):
+        if name.endswith(".py"):
+            with open(_os.path.join(directory, name), "rb") as f:
+                h.update(f.read())
+    for i in inputs:
+        data = i.encode("utf-8")
+        h.update("{}:".format(len(data)).encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+def transform_cached(inputs, callback, directory, jobs=1):
+    """
+    Transforms the given list of temporal programs like transform but stores
+    the result in the given cache directory.
+
+    The rewritten program is stored in string form together with the future
+    signatures and program parts. If the cache already holds an entry for the
+    inputs, the stored program is parsed and passed to the callback instead of
+    running the transformation again. Note that the locations of statements
+    obtained from the cache refer to the cache entry.
+
+    Arguments:
+    inputs    -- The list of inputs.
+    callback  -- Callback for rewritten statements.
+    directory -- The cache directory.
+    jobs      -- Number of processes to transform inputs in parallel.
+    """
+    path = _os.path.join(directory, _cache_key(inputs) + ".json")
+    try:
+        with open(path) as f:
+            entry = _json.load(f)
+    except (IOError, OSError, ValueError):
+        entry = None
+    if entry is not None:
+        _parse_statements(entry["program"], callback)
+        future_sigs    = [(name, arity, positive) for name, arity, positive in entry["future_sigs"]]
+        reground_parts = [(root, part, range(begin, end)) for root, part, begin, end in entry["reground_parts"]]
+        return future_sigs, reground_parts
+
+    statements = []
+    def append(s):
+        statements.append(_serialize(s))
+        callback(s)
+    future_sigs, reground_parts = transform(inputs, append, jobs)
+
+    entry = {"program":        "\n".join(statements) + "\n",
+             "future_sigs":    future_sigs,
+             "reground_parts": [(root, part, rng[0], rng[-1] + 1) for root, part, rng in reground_parts]}
+    try:
+        if not _os.path.isdir(directory):
+            _os.makedirs(directory)
+        fd, tmp = _tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with _os.fdopen(fd, "w") as f:
+            _json.dump(entry, f)
+        _os.rename(tmp, path)
+    except (IOError, OSError):
+        pass
+    return future_sigs, reground_parts
@@ -14,6 +14,7 @@ from operator import itemgetter as _itemgetter
 g_tel_false_atom = "__false"
 g_tel_keywords = ["true", "false", "final", "initial"]
 g_tel_shift_variable = "__S"
+g_tel_variable_prefix = "__V"
 
 def time_parameter(loc):
     return _ast.Symbol(loc, _clingo.Function(_tf.g_time_parameter_name))
@@ -513,6 +514,38 @@ def get_variables(x):
     VariablesVisitor(v)(x)
     return [val for _, val in sorted(v.items(), key=lambda x: x[0])]
 
+class VariableRenamer(_tf.Transformer):
+    """
+    Transformer renaming variables in the order of their first occurrence.
+
+    Anonymous variables are not renamed.
+
+    Attributes:
+    __variables -- reference to the resulting list of original variables
+    __names     -- map from original to new variable names
+    """
+    def __init__(self, variables):
+        """
+        Initializes the transformer with a reference to a list for storing the
+        original variables in the order of their first occurrence.
+        """
+        self.__variables = variables
+        self.__names     = {}
+
+    def visit_Variable(self, x):
+        """
+        Replaces the variable by its renamed counterpart.
+        """
+        if x.name == "_":
+            return x
+        name = self.__names.get(x.name)
+        if name is None:
+            name = "{}{}".format(g_tel_variable_prefix, len(self.__variables))
+            self.__names[x.name] = name
+            self.__names[name]   = name
+            self.__variables.append(x)
+        return _ast.Variable(x.location, name)
+
 # {{{1 transform_head
 
 # TODO: Something like this will be needed later at another place...
@@ -531,13 +564,26 @@ def factor_out_tel_formula(x):
         return [[x]]
 
 class HeadTransformer:
-    def __init__(self):
+    """
+    Transforms theory atoms over temporal formulas in rule heads.
+
+    Formulas that are equal modulo variable renaming share one auxiliary
+    predicate and its rules.
+
+    Members:
+    __prefix         -- Prefix of auxiliary predicates.
+    __num_aux        -- Number of auxiliary predicates introduced so far.
+    __false_external -- Whether the __false external has been added.
+    __formulas       -- Map from canonical formulas to auxiliary predicates.
+    """
+    def __init__(self, prefix="__aux_"):
+        self.__prefix = prefix
         self.__num_aux = 0
         self.__false_external = None
+        self.__formulas = {}
 
-    def __aux_atom(self, location, variables, inc=1):
-        self.__num_aux += inc
-        return _ast.Literal(location, _ast.Sign.NoSign, _ast.SymbolicAtom(_ast.Function(location, "__aux_{}".format(self.__num_aux - 1), variables, False)))
+    def __aux_atom(self, location, name, variables):
+        return _ast.Literal(location, _ast.Sign.NoSign, _ast.SymbolicAtom(_ast.Function(location, name, variables, False)))
 
     def __false_atom(self, location):
         return _ast.Literal(location, _ast.Sign.NoSign, _ast.SymbolicAtom(_ast.Function(location, g_tel_false_atom, [time_parameter(location)], False)))
@@ -546,14 +592,29 @@ class HeadTransformer:
         loc          = atom.location
         false        = self.__false_atom(loc)
         atom, ranges = transform_theory_atom(atom)
-        variables    = get_variables(atom)
         param        = time_parameter(loc)
         shift        = _ast.Variable(loc, g_tel_shift_variable)
-        aux          = self.__aux_atom(loc, variables + [param])
-        saux         = self.__aux_atom(loc, variables + [shift], inc=0)
         rules        = []
 
+        # rename variables to identify formulas equal modulo renaming
+        variables    = []
+        rename       = VariableRenamer(variables)
+        atom         = rename(atom)
+        ranges       = [((rename(lhs), rename(rhs)), [rename(head) for head in heads]) for (lhs, rhs), heads in ranges]
+        key          = str(atom)
+        name         = self.__formulas.get(key)
+        if name is not None:
+            return self.__aux_atom(loc, name, variables + [param]), rules
+
+        name = "{}{}".format(self.__prefix, self.__num_aux)
+        self.__num_aux += 1
+        self.__formulas[key] = name
+        canonical    = [_ast.Variable(loc, "{}{}".format(g_tel_variable_prefix, i)) for i in range(len(variables))]
+        aux          = self.__aux_atom(loc, name, canonical + [param])
+        saux         = self.__aux_atom(loc, name, canonical + [shift])
+
         if self.__false_external is None:
+            self.__false_external = false
             rules.append(_tf.External(loc, false.atom, []))
 
         rules.append(_ast.Rule(loc, atom, [aux]))
@@ -574,4 +635,4 @@ class HeadTransformer:
 
             rules.append(_ast.Rule(loc, _ast.Disjunction(loc, elems), [saux, false]))
 
-        return aux, rules
+        return self.__aux_atom(loc, name, variables + [param]), rules
@@ -32,21 +32,25 @@ class ProgramTransformer(_tf.Transformer):
                           future. Determines window to reground constraints.
                           Stored as a list with one integer element to allow
                           passing by reference.
+    __offset           -- Number of steps atoms of the current rule are
+                          shifted into the past.
     __term_transformer -- The transformer used to rewrite terms.
-    __constraint_parts -- Parts that have to be regrounded because of
-                          constraints referring to the future.
+    __constraint_parts -- Rules of constraints referring to the future
+                          indexed by program part and the offset from the
+                          horizon at which they have to be grounded.
     __aux_rules        -- Auxiliary always quantified rules added during
                           translation.
     """
-    def __init__(self, future_predicates, constraint_parts, aux_rules):
+    def __init__(self, future_predicates, constraint_parts, aux_rules, aux_prefix="__aux_"):
         self.__final = False
         self.__head = False
         self.__constraint = False
         self.__negation = False
         self.__normal = False
         self.__max_shift = [0]
+        self.__offset = 0
         self.__term_transformer = _tt.TermTransformer(future_predicates)
-        self.__head_transformer = _th.HeadTransformer()
+        self.__head_transformer = _th.HeadTransformer(aux_prefix)
         self.__constraint_parts = constraint_parts
         self.__aux_rules        = aux_rules
 
@@ -54,6 +58,103 @@ class ProgramTransformer(_tf.Transformer):
         loc = x.location
         x.body.append(_ast.Literal(loc, _ast.Sign.NoSign, _ast.SymbolicAtom(_ast.Function(loc, "__final", [_ast.Symbol(loc, param)] if param is not None else [], False))));
 
+    def __window_rule(self, rule, head_shift, shifts, offset):
+        """
+        Returns the given constraint for a time point offset steps before the
+        horizon or None if it is trivially satisfied there.
+
+        Atoms referring to time points after the horizon are false. Hence,
+        positive body literals over such atoms make the constraint satisfied
+        and negative ones can be dropped. If a literal that is not a plain
+        (possibly negated) atom refers beyond the horizon, the rule is kept
+        as is.
+
+        Arguments:
+        rule       -- The constraint.
+        head_shift -- The number of steps the head refers into the future.
+        shifts     -- The number of steps each body literal refers into the
+                      future.
+        offset     -- The number of steps up to the horizon.
+        """
+        simple = lambda lit: lit.type == _ast.ASTType.Literal and lit.atom.type == _ast.ASTType.SymbolicAtom
+        literals = [(rule.head, head_shift)] + list(zip(rule.body, shifts))
+        if any(shift > offset and not simple(lit) for lit, shift in literals):
+            return _ast.Rule(rule.location, rule.head, rule.body[:])
+        head = rule.head
+        if head_shift > offset:
+            if head.sign == _ast.Sign.Negation:
+                return None
+            head = _ast.Literal(head.location, _ast.Sign.NoSign, _ast.BooleanConstant(False))
+        body = []
+        for lit, shift in zip(rule.body, shifts):
+            if shift <= offset:
+                body.append(lit)
+            elif lit.sign != _ast.Sign.Negation:
+                return None
+        return _ast.Rule(rule.location, head, body)
+
+    def __future_shift(self, rule):
+        """
+        Returns the number of steps the head of the given normal rule refers
+        into the future if the rule can be shifted into the past and zero
+        otherwise.
+
+        Rules in final program parts and rules with theory atoms in their body
+        are not shifted because they depend on the time point they are
+        grounded for.
+        """
+        if not self.__normal or self.__final or self.__part not in ["initial", "always", "dynamic"]:
+            return 0
+        if any(lit.type == _ast.ASTType.Literal and lit.atom.type == _ast.ASTType.TheoryAtom for lit in rule.body):
+            return 0
+        term = rule.head.atom.term
+        while term.type in [_ast.ASTType.UnaryOperation, _ast.ASTType.Pool]:
+            term = term.argument if term.type == _ast.ASTType.UnaryOperation else term.arguments[0]
+        if term.type != _ast.ASTType.Function:
+            return 0
+        name = term.name
+        return max(0, len(name) - len(name.rstrip("'")) - (len(name) - len(name.lstrip("'"))))
+
+    def __shift_rule(self, rule, shift):
+        """
+        Shifts a normal rule whose head refers the given number of steps into
+        the future into the past.
+
+        The rule `p' :- q.` becomes `p :- 'q.` restricted to the time points
+        after the first one (for the always part). Because the next state has
+        to exist, the constraint `:- q, &final.` is added. For longer shifts,
+        this constraint is grounded for each time point before the horizon up
+        to which the shifted head would lie beyond the horizon.
+        """
+        loc = rule.location
+        window = []
+        _clingo.parse_program(str(rule), lambda s: window.append(s) if s.type == _ast.ASTType.Rule else None)
+
+        # the shifted rule
+        self.__offset = shift
+        rule.head = self.visit(rule.head)
+        self.__head = False
+        rule.body = self.visit(rule.body)
+        self.__offset = 0
+        time = _ast.Symbol(loc, _clingo.Function(_tf.g_time_parameter_name))
+        operator = {"initial": _ast.ComparisonOperator.Equal,
+                    "always":  _ast.ComparisonOperator.GreaterEqual,
+                    "dynamic": _ast.ComparisonOperator.GreaterThan}[self.__part]
+        rule.body.append(_ast.Literal(loc, _ast.Sign.NoSign, _ast.Comparison(operator, time, _ast.Symbol(loc, _clingo.Number(shift)))))
+
+        # the constraint requiring the next states to exist
+        self.__constraint = True
+        body = self.visit(window[0].body)
+        for offset in range(shift):
+            constraint = _ast.Rule(loc, _ast.Literal(loc, _ast.Sign.NoSign, _ast.BooleanConstant(False)), body[:])
+            self.__append_final(constraint, _clingo.Function(_tf.g_time_parameter_name_alt))
+            self.__constraint_parts.setdefault((self.__part, offset), []).append(constraint)
+
+        if self.__part == "initial":
+            self.__aux_rules.append(rule)
+            return None
+        return rule
+
     def visit(self, x, *args, **kwargs):
         """
         Extends the transformer's generic visit method to add the final atom to
@@ -72,23 +173,47 @@ class ProgramTransformer(_tf.Transformer):
         Sets the state flags when visiting a rule.
 
         After that the head and body of the rule are visited in the right context.
+
+        Constraints referring k steps into the future are removed from the
+        program. They are grounded once all referenced time points exist,
+        i.e., at offset k from the horizon. For the offsets below, variants of
+        the constraint, which only hold if the horizon is final, are grounded
+        with the literals referring beyond the horizon simplified away.
+
+        Normal rules with heads referring to the future are shifted into the
+        past if possible (see __shift_rule). Otherwise, their heads are
+        replaced by future atoms.
         """
         try:
             self.__head = True
             self.__max_shift = [0]
             self.__constraint = _tf.is_constraint(rule)
             self.__normal = _tf.is_normal(rule)
+            shift = self.__future_shift(rule)
+            if shift > 0:
+                return self.__shift_rule(rule, shift)
             rule.head = self.visit(rule.head)
+            head_shift = self.__max_shift[0]
             self.__head = False
-            rule.body = self.visit(rule.body)
-            if self.__max_shift[0] > 0 and not self.__final:
-                last = _ast.Rule(rule.location, rule.head, rule.body[:])
-                self.__append_final(rule, _clingo.Function(_tf.g_time_parameter_name_alt))
-                self.__constraint_parts.setdefault((self.__part, self.__max_shift[0]), []).append((rule, last))
+            body, shifts = [], []
+            for lit in rule.body:
+                self.__max_shift = [0]
+                body.append(self.visit(lit))
+                shifts.append(self.__max_shift[0])
+            rule.body = body
+            max_shift = max([head_shift] + shifts)
+            if max_shift > 0 and not self.__final:
+                for offset in range(max_shift):
+                    window = self.__window_rule(rule, head_shift, shifts, offset)
+                    if window is not None:
+                        self.__append_final(window, _clingo.Function(_tf.g_time_parameter_name_alt))
+                        self.__constraint_parts.setdefault((self.__part, offset), []).append(window)
+                self.__constraint_parts.setdefault((self.__part, max_shift), []).append(rule)
                 return None
         finally:
             self.__head        = False
             self.__max_shift   = [0]
+            self.__offset      = 0
             self.__constraint  = False
             self.__normal = False
         return rule
@@ -126,7 +251,7 @@ class ProgramTransformer(_tf.Transformer):
         If this atom appears in a head then it is also replaced by a
         corresponding future atom defined later.
         """
-        atom.term = self.__term_transformer.visit(atom.term, self.__head, not self.__constraint and (not self.__head or not self.__normal), self.__head, self.__max_shift)
+        atom.term = self.__term_transformer.visit(atom.term, self.__head, not self.__constraint and (not self.__head or not self.__normal), self.__head, self.__max_shift, self.__offset)
         return atom
 
     def visit_TheoryAtom(self, atom):
@@ -32,7 +32,7 @@ class TermTransformer(_tf.Transformer):
         self.__future_predicates = future_predicates
         self.__positive = True
 
-    def __get_param(self, name, arity, location, replace_future, fail_future, fail_past, max_shift):
+    def __get_param(self, name, arity, location, replace_future, fail_future, fail_past, max_shift, offset=0):
         """
         Strips previous and next operators from function names
         and returns the updated name plus the time arguments to append.
@@ -55,6 +55,9 @@ class TermTransformer(_tf.Transformer):
         fail_past      -- Fail if the atom refers to the past.
         max_shift      -- The maximum number of steps terms look into the
                           future.
+        offset         -- Number of steps to shift atoms into the past
+                          (atoms using the initially operator are not
+                          shifted).
 
         Example for body atoms:
 
@@ -89,6 +92,8 @@ class TermTransformer(_tf.Transformer):
             if n.startswith("'") or name.startswith("'") or name.endswith("'"):
                 raise RuntimeError("initially operator cannot be used with primes: {}".format(_tf.str_location(location)))
             initially = True
+        else:
+            shift -= offset
 
         finally_ = False
         if n.endswith("_") and not n.endswith("__"):
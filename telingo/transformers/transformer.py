@@ -78,6 +78,22 @@ def is_disjunction(s):
     """
     return (s.type == _ast.ASTType.Rule and s.head.type == _ast.ASTType.Disjunction)
 
+_g_visitors = {}
+
+def _visitor(cls, node_type):
+    """
+    Returns the visit_TYPE method of the given class for the given node type
+    or None if there is no such method.
+
+    Lookups are cached per class and type.
+    """
+    key = (cls, node_type)
+    try:
+        return _g_visitors[key]
+    except KeyError:
+        ret = _g_visitors[key] = getattr(cls, "visit_" + node_type, None)
+        return ret
+
 class Transformer:
     """
     Basic visitor to traverse and modify an AST.
@@ -90,13 +106,30 @@ class Transformer:
     Function visit should be called on the root of the AST to be visited. It is
     the users responsibility to visit children of nodes that have node-specific
     visitor.
+
+    There is no native counterpart of this class: clingo 5.4, which the
+    package is written against, ships no AST transformer, and the AST of later
+    versions is immutable, so the transformations could not be ported to it
+    one to one.
     """
     def visit_children(self, x, *args, **kwargs):
         """
         Visits and transforms the children of the given node.
+
+        Lists of children are updated in place and only children that have
+        been replaced are reassigned.
         """
         for key in x.child_keys:
-            setattr(x, key, self.visit(getattr(x, key), *args, **kwargs))
+            child = getattr(x, key)
+            if isinstance(child, list):
+                for i, y in enumerate(child):
+                    z = self.visit(y, *args, **kwargs)
+                    if z is not y:
+                        child[i] = z
+            else:
+                z = self.visit(child, *args, **kwargs)
+                if z is not child:
+                    setattr(x, key, z)
         return x
 
     def visit(self, x, *args, **kwargs):
@@ -112,9 +145,9 @@ class Transformer:
         function called for child nodes.
         """
         if hasattr(x, "type"):
-            attr = "visit_" + str(x.type)
-            if hasattr(self, attr):
-                return getattr(self, attr)(x, *args, **kwargs)
+            method = _visitor(self.__class__, str(x.type))
+            if method is not None:
+                return method(self, x, *args, **kwargs)
             else:
                 return self.visit_children(x, *args, **kwargs)
         elif isinstance(x, list):